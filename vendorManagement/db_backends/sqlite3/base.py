@@ -0,0 +1,22 @@
+"""
+SQLite backend that applies settings.SQLITE_PRAGMAS to every new
+connection and starts transactions with BEGIN IMMEDIATE.
+
+With the default deferred BEGIN a transaction that reads before it
+writes fails at once with "database is locked" when another connection
+wrote in the meantime, taking the write lock up front makes it wait for
+busy_timeout instead.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import PurchaseOrder, Vendor, HistoricalPerformance
+from .models import (
+    PurchaseOrder, PurchaseOrderLine, Vendor, HistoricalPerformance,
+)
 
 
 admin.site.register(Vendor)
 admin.site.register(PurchaseOrder)
+admin.site.register(PurchaseOrderLine)
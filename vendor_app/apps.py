@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class VendorAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vendor_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
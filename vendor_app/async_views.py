@@ -0,0 +1,214 @@
+'''
+Async versions of the read endpoints, for deployments behind an ASGI
+server (see vendorManagement/asgi.py). Database access goes through
+the async ORM and waiting, such as long polls on the performance
+endpoint, happens on the event loop instead of holding a worker thread.
+'''
+import asyncio
+import math
+import time
+from functools import wraps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework.exceptions import (
+    APIException, AuthenticationFailed, ValidationError,
+)
+from rest_framework_simplejwt.settings import api_settings
+from .models import Vendor, PurchaseOrder
+from .serializers import VendorSerializer, PurchaseOrderSerializer
+from .fast_serializers import (
+    VendorFastSerializer,
+    VendorPerformanceFastSerializer,
+    PurchaseOrderFastSerializer,
+)
+from .renderers import FastJSONRenderer
+from .pagination import VendorPagination, PurchaseOrderPagination
+from .filters import filter_purchase_orders
+from .authentication import CachedJWTAuthentication
+from . import cache, rolling
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    '''
+    CachedJWTAuthentication with the user lookup on a cache miss done by
+    the async ORM, the token itself is validated in memory.
+    '''
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is not None:
+            return user
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        try:
+            user = await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        self.cache_user(validated_token, user)
+        return user
+
+
+def json_response(data, status=200, **kwargs):
+    return HttpResponse(
+        FastJSONRenderer().render(data), status=status,
+        content_type='application/json', **kwargs
+    )
+
+
+def error_response(exception, **kwargs):
+    '''
+    JSON response for a DRF APIException, in the shape the sync views get
+    from DRF's exception handler: dict and list details as they are,
+    others wrapped in {'detail': ...}.
+    '''
+    detail = exception.detail
+    if not isinstance(detail, (dict, list)):
+        detail = {'detail': detail}
+    return json_response(detail, status=exception.status_code, **kwargs)
+
+
+def admin_required(view):
+    '''
+    Async counterpart of the IsAuthenticated + IsAdminUser permission
+    classes used by the sync views.
+    '''
+    authentication = AsyncJWTAuthentication()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            authenticated = await authentication.aauthenticate(request)
+        except APIException as e:
+            return error_response(
+                e, headers={'WWW-Authenticate': authentication.authenticate_header(request)})
+        if authenticated is None:
+            return json_response(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=401,
+                headers={'WWW-Authenticate': authentication.authenticate_header(request)}
+            )
+        request.user, request.auth = authenticated
+        if not request.user.is_staff:
+            return json_response(
+                {'detail': 'You do not have permission to perform this action.'},
+                status=403
+            )
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def paginated(request, queryset, paginator, fast_serializer_class):
+    try:
+        page = paginator.page_queryset(
+            fast_serializer_class.values(queryset, named=True), request)
+    except APIException as e:
+        return error_response(e)
+    results = paginator.finish_page([row async for row in page])
+    return json_response({
+        'next': paginator.next,
+        'previous': paginator.previous,
+        'results': fast_serializer_class.to_representation(results),
+    })
+
+
+@admin_required
+async def vendor_list(request):
+    return await paginated(
+        request, Vendor.objects.all(), VendorPagination(), VendorFastSerializer)
+
+
+@admin_required
+async def vendor_detail(request, pk):
+    try:
+        vendor = await Vendor.objects.aget(pk=pk)
+    except Vendor.DoesNotExist:
+        return json_response({'detail': 'Not found.'}, status=404)
+    return json_response(VendorSerializer(vendor).data)
+
+
+@admin_required
+async def purchase_order_list(request):
+    try:
+        queryset = filter_purchase_orders(
+            PurchaseOrder.objects.all(), request.GET)
+    except ValidationError as e:
+        return json_response(e.detail, status=400)
+    return await paginated(
+        request, queryset, PurchaseOrderPagination(),
+        PurchaseOrderFastSerializer
+    )
+
+
+@admin_required
+async def purchase_order_detail(request, pk):
+    try:
+        purchase_order = await PurchaseOrder.objects.aget(pk=pk)
+    except PurchaseOrder.DoesNotExist:
+        return json_response({'detail': 'Not found.'}, status=404)
+    return json_response(PurchaseOrderSerializer(purchase_order).data)
+
+
+async def vendor_performance_entry(vendor_id):
+    cached = await cache.aget_vendor_performance(vendor_id)
+    if cached is None:
+        rows = [
+            row async for row in VendorPerformanceFastSerializer.values(
+                Vendor.objects.filter(pk=vendor_id))
+        ]
+        if not rows:
+            return None
+        data = VendorPerformanceFastSerializer.to_representation(rows)[0]
+        today = timezone.localdate()
+        data['rolling'] = rolling.rolling_metrics(
+            [row async for row in rolling.window_rows(vendor_id, today)], today)
+        cached = await cache.aset_vendor_performance(vendor_id, data)
+    return cached
+
+
+@admin_required
+async def vendor_performance(request, vendor):
+    '''
+    Performance metrics of a vendor. With If-None-Match and `wait=<seconds>`
+    the request is held until the metrics change or the wait runs out
+    (long poll), checking the cache every VENDOR_LONG_POLL_INTERVAL.
+    '''
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = math.nan
+    if not math.isfinite(wait) or wait < 0:
+        return json_response(
+            {'message': 'wait must be a non-negative number'}, status=400)
+    wait = min(wait, settings.VENDOR_LONG_POLL_MAX_WAIT)
+    deadline = time.monotonic() + wait
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+
+    while True:
+        cached = await vendor_performance_entry(vendor)
+        if cached is None:
+            return json_response({'message': 'Vendor not found'}, status=404)
+        payload, etag = cached
+        if etag not in client_etags:
+            return json_response(payload, headers={'ETag': etag})
+        if time.monotonic() >= deadline:
+            response = HttpResponse(status=304)
+            response['ETag'] = etag
+            return response
+        await asyncio.sleep(min(
+            settings.VENDOR_LONG_POLL_INTERVAL, deadline - time.monotonic()))
@@ -0,0 +1,113 @@
+'''
+JWT authentication with the user lookup cached in process memory.
+
+Resolved users are kept for VENDOR_AUTH_CACHE_TIMEOUT seconds in a
+bounded LRU keyed by user id, so polling clients cost no user query per
+request. Saving or deleting a user drops its entry in the process that
+made the change, other processes see it once the entry expires.
+'''
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+# What is kept of a user, enough for the permission checks of the API
+CACHED_USER_FIELDS = ('id', 'username', 'is_staff', 'is_superuser', 'is_active')
+
+
+class TTLCache:
+    '''
+    Thread safe LRU of at most maxsize entries expiring after timeout
+    seconds.
+    '''
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = TTLCache(
+    settings.VENDOR_AUTH_CACHE_SIZE, settings.VENDOR_AUTH_CACHE_TIMEOUT)
+
+
+def invalidate_cached_user(user):
+    user_cache.delete(str(getattr(user, api_settings.USER_ID_FIELD)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    '''
+    JWTAuthentication answering from user_cache when it can. The stock
+    lookup runs on a miss, so users that are missing or inactive are
+    rejected by it and never cached.
+    '''
+
+    def get_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            self.cache_user(validated_token, user)
+        return user
+
+    def get_cached_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        entry = user_cache.get(str(user_id))
+        if entry is None:
+            return None
+        fields, password_hash = entry
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code='password_changed')
+        # A fresh unsaved instance per request, nothing is shared between them
+        return self.user_model(**fields)
+
+    def cache_user(self, validated_token, user):
+        fields = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+        password_hash = (
+            get_md5_hash_password(user.password)
+            if api_settings.CHECK_REVOKE_TOKEN else None
+        )
+        user_cache.set(
+            str(validated_token[api_settings.USER_ID_CLAIM]),
+            (fields, password_hash)
+        )
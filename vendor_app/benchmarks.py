@@ -0,0 +1,235 @@
+'''
+Load test harness for the API hot paths, driven by the benchmark_api
+management command.
+
+Synthetic vendors and purchase orders are inserted with the seed_data
+generators, then every scenario is run through the Django test client,
+first one request at a time with the queries of each request counted
+and then from concurrent threads.
+'''
+import random
+import statistics
+import threading
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, DatabaseError
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import Vendor, PurchaseOrder
+from . import utils, rolling, seeding
+
+
+BENCHMARK_USERNAME = 'benchmark-api'
+
+
+class BenchmarkData:
+    '''
+    Ids of the seeded rows. Scenarios that change a purchase order take
+    it from a pool, so no order is acknowledged or completed twice.
+    '''
+
+    def __init__(self, prefix, vendor_ids, acknowledge_pool, complete_pool):
+        self.prefix = prefix
+        self.vendor_ids = vendor_ids
+        self.acknowledge_pool = acknowledge_pool
+        self.complete_pool = complete_pool
+
+    def take(self, pool):
+        try:
+            return pool.pop()
+        except IndexError:
+            raise LookupError('Ran out of seeded purchase orders, seed more')
+
+
+# Mostly pending orders, half of them unacknowledged, so the acknowledge
+# and complete scenarios have enough to take from
+STATUS_WEIGHTS = {'COMPLETED': 0.15, 'PENDING': 0.8, 'CANCELLED': 0.05}
+
+
+def seed(vendors, orders, batch_size=1000, seed=0, chunk_size=50000):
+    '''
+    Insert vendors and purchase orders with the seed_data generators,
+    weighted towards pending orders, then rebuild the vendor metrics.
+    '''
+    prefix = f'BENCH-{uuid.uuid4().hex[:8]}'
+    profiles = seeding.seed_vendors(vendors, prefix, seed, batch_size)
+    vendor_ids = [profile.vendor_id for profile in profiles]
+
+    now = timezone.now()
+    for chunk, start in enumerate(range(0, orders, chunk_size)):
+        seeding.seed_purchase_orders(
+            chunk, start, min(start + chunk_size, orders), prefix, seed,
+            profiles, now, batch_size, STATUS_WEIGHTS
+        )
+
+    for start in range(0, len(vendor_ids), batch_size):
+        utils.rebuild_metrics_chunk(vendor_ids[start:start + batch_size])
+        rolling.rebuild_daily_performance(vendor_ids[start:start + batch_size])
+
+    pending = list(
+        PurchaseOrder.objects.filter(
+            po_number__startswith=f'{prefix}-', status='PENDING',
+            acknowledgment_date__isnull=True
+        ).order_by('id').values_list('id', flat=True)
+    )
+    random.Random(seed).shuffle(pending)
+    middle = len(pending) // 2
+    return BenchmarkData(prefix, vendor_ids, pending[:middle], pending[middle:])
+
+
+def cleanup(data):
+    Vendor.objects.filter(vendor_code__startswith=f'{data.prefix}-').delete()
+    get_user_model().objects.filter(username=BENCHMARK_USERNAME).delete()
+
+
+def vendor_list(client, data, rng):
+    return client.get(reverse('create-vendor'))
+
+
+def purchase_order_list(client, data, rng):
+    return client.get(
+        reverse('create-purchase-order'),
+        {'vendor': rng.choice(data.vendor_ids)}
+    )
+
+
+def vendor_performance(client, data, rng):
+    return client.get(
+        reverse('vendor-performance', args=[rng.choice(data.vendor_ids)]))
+
+
+def performance_ranking(client, data, rng):
+    return client.get(
+        reverse('vendor-performance-batch'),
+        {'ordering': 'on_time_delivery_rate', 'limit': 20}
+    )
+
+
+def acknowledge(client, data, rng):
+    return client.post(reverse(
+        'acknowledge_purchase_order',
+        args=[data.take(data.acknowledge_pool)]
+    ))
+
+
+def complete(client, data, rng):
+    return client.put(
+        reverse('purchase-order-detail', args=[data.take(data.complete_pool)]),
+        {'status': 'COMPLETED', 'quality_rating': rng.choice([3, 4, 5])},
+        content_type='application/json'
+    )
+
+
+SCENARIOS = {
+    'vendor_list': vendor_list,
+    'purchase_order_list': purchase_order_list,
+    'vendor_performance': vendor_performance,
+    'performance_ranking': performance_ranking,
+    'acknowledge': acknowledge,
+    'complete': complete,
+}
+
+
+def make_client(host='localhost'):
+    '''
+    Test client authenticated as a staff user created for the run.
+    '''
+    user, _ = get_user_model().objects.get_or_create(
+        username=BENCHMARK_USERNAME, defaults={'is_staff': True})
+    token = RefreshToken.for_user(user).access_token
+    return Client(SERVER_NAME=host, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+def summarize(latencies, elapsed, errors, queries=None):
+    if not latencies:
+        return {'requests': 0, 'errors': errors}
+    quantiles = statistics.quantiles(latencies, n=100) \
+        if len(latencies) > 1 else latencies * 99
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+    }
+    if queries:
+        summary['queries_mean'] = round(statistics.fmean(queries), 2)
+        summary['queries_max'] = max(queries)
+    return summary
+
+
+def run_sequential(scenario, data, requests, client, rng):
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            try:
+                response = scenario(client, data, rng)
+            except LookupError:
+                errors += 1
+                continue
+            latency = time.perf_counter() - request_started
+        if response.status_code >= 400:
+            errors += 1
+            continue
+        latencies.append(latency)
+        queries.append(len(captured))
+    return summarize(latencies, time.perf_counter() - started, errors, queries)
+
+
+def run_concurrent(scenario, data, requests, threads, host, seed):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    per_thread = max(1, requests // threads)
+
+    def worker(number):
+        rng = random.Random(seed + number)
+        client = make_client(host)
+        try:
+            for _ in range(per_thread):
+                request_started = time.perf_counter()
+                try:
+                    response = scenario(client, data, rng)
+                    failed = response.status_code >= 400
+                except (DatabaseError, LookupError):
+                    failed = True
+                latency = time.perf_counter() - request_started
+                with lock:
+                    if failed:
+                        errors[0] += 1
+                    else:
+                        latencies.append(latency)
+        finally:
+            connections.close_all()
+
+    workers = [
+        threading.Thread(target=worker, args=(number,))
+        for number in range(threads)
+    ]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def run(data, scenarios, requests, threads, host='localhost', seed=0):
+    rng = random.Random(seed)
+    client = make_client(host)
+    results = {}
+    for name in scenarios:
+        scenario = SCENARIOS[name]
+        results[name] = {
+            'sequential': run_sequential(scenario, data, requests, client, rng),
+        }
+        if threads > 1:
+            results[name]['concurrent'] = run_concurrent(
+                scenario, data, requests, threads, host, seed)
+    return results
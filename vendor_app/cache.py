@@ -0,0 +1,80 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def performance_cache():
+    return caches[settings.VENDOR_PERFORMANCE_CACHE]
+
+
+def performance_cache_key(vendor_id):
+    return f'vendor-performance:{vendor_id}'
+
+
+def make_etag(payload):
+    body = json.dumps(payload, cls=JSONEncoder, sort_keys=True)
+    return '"%s"' % hashlib.md5(body.encode()).hexdigest()
+
+
+def get_vendor_performance(vendor_id):
+    '''
+    Cached (payload, etag) of the performance endpoint for a vendor,
+    or None when it has to be read from the database.
+    '''
+    return performance_cache().get(performance_cache_key(vendor_id))
+
+
+def set_vendor_performance(vendor_id, payload):
+    entry = (payload, make_etag(payload))
+    performance_cache().set(
+        performance_cache_key(vendor_id), entry,
+        settings.VENDOR_PERFORMANCE_CACHE_TIMEOUT
+    )
+    return entry
+
+
+async def aget_vendor_performance(vendor_id):
+    return await performance_cache().aget(performance_cache_key(vendor_id))
+
+
+async def aset_vendor_performance(vendor_id, payload):
+    entry = (payload, make_etag(payload))
+    await performance_cache().aset(
+        performance_cache_key(vendor_id), entry,
+        settings.VENDOR_PERFORMANCE_CACHE_TIMEOUT
+    )
+    return entry
+
+
+def invalidate_vendor_performance(vendor_id):
+    '''
+    Drops the cached performance of a vendor now and again once the
+    current transaction commits, so a read racing the write cannot
+    put the old metrics back in the cache.
+    '''
+    key = performance_cache_key(vendor_id)
+    performance_cache().delete(key)
+    transaction.on_commit(lambda: performance_cache().delete(key))
+
+
+def dashboard_cache_key(params):
+    return 'dashboard:' + ':'.join(f'{name}={value}' for name, value in params)
+
+
+def get_dashboard(params):
+    '''
+    Cached dashboard summary for a tuple of (parameter, value) pairs.
+    Entries are not invalidated by writes, they expire after
+    VENDOR_DASHBOARD_CACHE_TIMEOUT seconds.
+    '''
+    return performance_cache().get(dashboard_cache_key(params))
+
+
+def set_dashboard(params, summary):
+    performance_cache().set(
+        dashboard_cache_key(params), summary,
+        settings.VENDOR_DASHBOARD_CACHE_TIMEOUT
+    )
@@ -0,0 +1,93 @@
+'''
+Fleet wide numbers for the operations dashboard, each section computed
+by a single aggregate query.
+'''
+from django.db.models import Q, F, Count, Min, Max, Avg
+from django.utils import timezone
+from .models import Vendor, PurchaseOrder
+
+
+# Upper bounds of the histogram buckets of each vendor metric
+METRIC_HISTOGRAM_BOUNDS = {
+    'on_time_delivery_rate': (0.5, 0.8, 0.9, 0.95),
+    'quality_rating_avg': (2.0, 3.0, 4.0, 4.5),
+    'average_response_time': (0.25, 1.0, 2.0, 7.0),
+    'fulfillment_rate': (0.5, 0.8, 0.9, 0.95),
+}
+
+
+def purchase_order_counts(now, stale_after):
+    '''
+    Conditional counts shared by the totals and the per-vendor breakdown:
+    orders per status, pending orders past their delivery date, and
+    orders not acknowledged within stale_after of being issued.
+    '''
+    counts = {'total': Count('id')}
+    for order_status, _ in PurchaseOrder.ORDER_STATUS_CHOICES:
+        counts[order_status.lower()] = Count('id', filter=Q(status=order_status))
+    counts['overdue'] = Count(
+        'id', filter=Q(status='PENDING', delivery_date__lt=now))
+    counts['unacknowledged'] = Count(
+        'id', filter=Q(acknowledgment_date__isnull=True,
+                       issue_date__lt=now - stale_after))
+    return counts
+
+
+def vendor_summary():
+    '''
+    Number of vendors and the distribution of each metric across them:
+    min, average, max and a histogram.
+    '''
+    aggregates = {'total': Count('id')}
+    for metric, bounds in METRIC_HISTOGRAM_BOUNDS.items():
+        aggregates[f'{metric}__count'] = Count('id', filter=Q(**{f'{metric}__isnull': False}))
+        aggregates[f'{metric}__min'] = Min(metric)
+        aggregates[f'{metric}__avg'] = Avg(metric)
+        aggregates[f'{metric}__max'] = Max(metric)
+        lower = None
+        for index, upper in enumerate((*bounds, None)):
+            condition = Q()
+            if lower is not None:
+                condition &= Q(**{f'{metric}__gte': lower})
+            if upper is not None:
+                condition &= Q(**{f'{metric}__lt': upper})
+            else:
+                condition &= Q(**{f'{metric}__isnull': False})
+            aggregates[f'{metric}__bucket{index}'] = Count('id', filter=condition)
+            lower = upper
+
+    row = Vendor.objects.aggregate(**aggregates)
+    distributions = {}
+    for metric, bounds in METRIC_HISTOGRAM_BOUNDS.items():
+        edges = (None, *bounds, None)
+        distributions[metric] = {
+            'vendors': row[f'{metric}__count'],
+            'min': row[f'{metric}__min'],
+            'avg': row[f'{metric}__avg'],
+            'max': row[f'{metric}__max'],
+            'histogram': [
+                {'gte': edges[index], 'lt': edges[index + 1],
+                 'vendors': row[f'{metric}__bucket{index}']}
+                for index in range(len(bounds) + 1)
+            ],
+        }
+    return {'total': row['total'], 'metrics': distributions}
+
+
+def dashboard_summary(stale_after, by_vendor=False, limit=None):
+    now = timezone.now()
+    counts = purchase_order_counts(now, stale_after)
+    summary = {
+        'generated_at': now,
+        'unacknowledged_after_hours': stale_after.total_seconds() / 3600,
+        'purchase_orders': PurchaseOrder.objects.aggregate(**counts),
+        'vendors': vendor_summary(),
+    }
+    if by_vendor:
+        summary['by_vendor'] = list(
+            PurchaseOrder.objects.values(
+                'vendor_id', vendor_code=F('vendor__vendor_code'))
+            .annotate(**counts)
+            .order_by('-overdue', '-unacknowledged', 'vendor_id')[:limit]
+        )
+    return summary
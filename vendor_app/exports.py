@@ -0,0 +1,88 @@
+import csv
+import json
+from datetime import date, datetime
+
+
+PURCHASE_ORDER_EXPORT_FIELDS = (
+    'id', 'po_number', 'vendor_id', 'order_date', 'delivery_date', 'items',
+    'quantity', 'status', 'quality_rating', 'issue_date',
+    'acknowledgment_date', 'promised_delivery_date', 'delivered_on_time',
+    'response_time_seconds',
+)
+
+VENDOR_EXPORT_FIELDS = (
+    'id', 'name', 'contact_details', 'address', 'vendor_code',
+    'on_time_delivery_rate', 'quality_rating_avg', 'average_response_time',
+    'fulfillment_rate',
+)
+
+
+def export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(queryset, fields, chunk_size):
+    '''
+    Yields chunks of value tuples in id order, each read with its own
+    `WHERE id > last ORDER BY id LIMIT chunk_size` query so no more than
+    chunk_size rows are held in memory.
+
+    iterator() would rely on a server side cursor, which PostgreSQL
+    behind a PgBouncer transaction pool cannot use
+    (DISABLE_SERVER_SIDE_CURSORS), and would then load every row. Rows
+    committed while the export runs show up if their id is still ahead.
+    '''
+    rows = queryset.values_list(*fields).order_by('id')
+    id_index = fields.index('id')
+    last_id = None
+    while True:
+        page = rows if last_id is None else rows.filter(id__gt=last_id)
+        chunk = list(page[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][id_index]
+
+
+def ndjson_stream(queryset, fields, chunk_size):
+    for chunk in iter_rows(queryset, fields, chunk_size):
+        yield ''.join(
+            json.dumps(
+                dict(zip(fields, map(export_value, row))),
+                separators=(',', ':')
+            ) + '\n'
+            for row in chunk
+        )
+
+
+class Echo:
+    '''
+    File like object that hands back what csv.writer writes to it.
+    '''
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'))
+    return export_value(value)
+
+
+def csv_stream(queryset, fields, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for chunk in iter_rows(queryset, fields, chunk_size):
+        yield ''.join(
+            writer.writerow([csv_cell(value) for value in row])
+            for row in chunk
+        )
+
+
+EXPORT_TYPES = {
+    'ndjson': (ndjson_stream, 'application/x-ndjson'),
+    'csv': (csv_stream, 'text/csv'),
+}
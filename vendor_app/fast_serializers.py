@@ -0,0 +1,113 @@
+'''
+Read-only serializers for large responses.
+
+Rows are read as tuples with values_list() and turned into dicts with a
+converter per field picked once, when the serializer class is created,
+instead of building a model instance and running every DRF field of it
+for each row. The output is the same as the ModelSerializer it stands in
+for.
+'''
+from django.db import models
+from django.utils import timezone
+from .models import Vendor, PurchaseOrder
+from .serializers import VendorSerializer, VendorPerformanceSerializer
+
+
+def datetime_converter(tz):
+    # Same output as DRF's DateTimeField with the default ISO 8601 format
+    def convert(value):
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def date_converter(tz):
+    return lambda value: value.isoformat()
+
+
+def decimal_converter(tz):
+    return str
+
+
+def float_converter(tz):
+    return float
+
+
+# Checked in order, DateTimeField is a subclass of DateField
+CONVERTERS = (
+    (models.DateTimeField, datetime_converter),
+    (models.DateField, date_converter),
+    (models.DecimalField, decimal_converter),
+    (models.FloatField, float_converter),
+)
+
+
+def field_converter(field):
+    for field_class, converter in CONVERTERS:
+        if isinstance(field, field_class):
+            return converter
+    return None
+
+
+class FastSerializer:
+    '''
+    Subclasses set the model and the fields to output, foreign keys are
+    output as the related primary key like a ModelSerializer does.
+    '''
+    model = None
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        model_fields = [cls.model._meta.get_field(name) for name in cls.fields]
+        cls.sources = tuple(field.attname for field in model_fields)
+        cls.converters = tuple(field_converter(field) for field in model_fields)
+
+    @classmethod
+    def values(cls, queryset, named=False):
+        '''
+        The queryset narrowed to the tuples to_representation() reads,
+        named tuples can be paginated like model instances.
+        '''
+        return queryset.values_list(*cls.sources, named=named)
+
+    @classmethod
+    def to_representation(cls, rows):
+        tz = timezone.get_current_timezone()
+        fields = [
+            (index, name, converter and converter(tz))
+            for index, (name, converter)
+            in enumerate(zip(cls.fields, cls.converters))
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for index, name, convert in fields:
+                value = row[index]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+    @classmethod
+    def serialize(cls, queryset):
+        return cls.to_representation(cls.values(queryset))
+
+
+class VendorFastSerializer(FastSerializer):
+    model = Vendor
+    fields = tuple(VendorSerializer.Meta.fields)
+
+
+class VendorPerformanceFastSerializer(FastSerializer):
+    model = Vendor
+    fields = tuple(VendorPerformanceSerializer.Meta.fields)
+
+
+class PurchaseOrderFastSerializer(FastSerializer):
+    # PurchaseOrderSerializer outputs every field
+    model = PurchaseOrder
+    fields = tuple(field.name for field in PurchaseOrder._meta.concrete_fields)
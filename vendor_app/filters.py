@@ -0,0 +1,118 @@
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .models import PurchaseOrder
+
+
+STATUSES = {value for value, _ in PurchaseOrder.ORDER_STATUS_CHOICES}
+
+# Query parameter -> range lookup on the purchase order
+DATE_RANGE_PARAMS = {
+    'order_date_after': 'order_date__gte',
+    'order_date_before': 'order_date__lte',
+    'delivery_date_after': 'delivery_date__gte',
+    'delivery_date_before': 'delivery_date__lte',
+}
+
+BOOLEAN_VALUES = {
+    'true': True, '1': True, 'yes': True,
+    'false': False, '0': False, 'no': False,
+}
+
+
+# Largest value of a 64 bit primary key column
+MAX_ID = 2 ** 63 - 1
+
+
+def is_id(value):
+    '''
+    Whether a parameter is a primary key, str.isdigit() alone accepts
+    characters such as superscripts that int() rejects, and larger
+    numbers overflow the database driver.
+    '''
+    if not (isinstance(value, str) and value.isascii() and value.isdigit()):
+        return False
+    return int(value) <= MAX_ID
+
+
+def parse_datetime_param(name, value):
+    invalid = ValidationError({name: ['Expected an ISO 8601 date or datetime.']})
+    # Well formed but impossible values (2024-02-30) raise ValueError
+    try:
+        parsed = parse_datetime(value)
+        day = parse_date(value) if parsed is None else None
+    except ValueError:
+        raise invalid
+    if parsed is None:
+        if day is None:
+            raise invalid
+        parsed = timezone.datetime.combine(day, timezone.datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_purchase_orders(queryset, params):
+    '''
+    Narrows a purchase order queryset with the list query parameters:
+    vendor, status, acknowledged and the order/delivery date ranges.
+
+    Each filter lines up with one of the composite indexes declared on
+    PurchaseOrder.Meta.
+    '''
+    filters = {}
+
+    vendor = params.get('vendor')
+    if vendor:
+        if not is_id(vendor):
+            raise ValidationError({'vendor': ['Expected a vendor id.']})
+        filters['vendor_id'] = int(vendor)
+
+    order_status = params.get('status')
+    if order_status:
+        order_status = order_status.upper()
+        if order_status not in STATUSES:
+            raise ValidationError({
+                'status': [f'Expected one of {", ".join(sorted(STATUSES))}.']
+            })
+        filters['status'] = order_status
+
+    acknowledged = params.get('acknowledged')
+    if acknowledged:
+        if acknowledged.lower() not in BOOLEAN_VALUES:
+            raise ValidationError({'acknowledged': ['Expected true or false.']})
+        filters['acknowledgment_date__isnull'] = (
+            not BOOLEAN_VALUES[acknowledged.lower()]
+        )
+
+    for name, lookup in DATE_RANGE_PARAMS.items():
+        if params.get(name):
+            filters[lookup] = parse_datetime_param(name, params[name])
+
+    return queryset.filter(**filters)
+
+
+def filter_purchase_order_lines(queryset, params):
+    '''
+    Narrows a purchase order line queryset with the aggregate query
+    parameters: sku (comma separated), vendor and the order date range.
+    '''
+    filters = {}
+
+    skus = [sku.strip() for sku in params.get('sku', '').split(',') if sku.strip()]
+    if skus:
+        filters['sku__in'] = skus
+
+    vendor = params.get('vendor')
+    if vendor:
+        if not is_id(vendor):
+            raise ValidationError({'vendor': ['Expected a vendor id.']})
+        filters['vendor_id'] = int(vendor)
+
+    for name in ('order_date_after', 'order_date_before'):
+        if params.get(name):
+            lookup = DATE_RANGE_PARAMS[name]
+            filters[f'purchase_order__{lookup}'] = parse_datetime_param(
+                name, params[name])
+
+    return queryset.filter(**filters)
@@ -0,0 +1,172 @@
+'''
+In-process request and function timings, rendered in the Prometheus
+text format by the /api/_metrics endpoint.
+
+Each process keeps its own numbers, a scraper has to reach every worker
+(or run a single one) to see them all.
+'''
+import bisect
+import logging
+import threading
+import time
+from functools import wraps
+from django.conf import settings
+
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Upper bounds of the queries per request histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Label value that new series are folded into once the store is full
+OVERFLOW_LABEL = '__other__'
+
+slow_query_logger = logging.getLogger('vendor_app.slow_queries')
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsStore:
+    '''
+    Counters and histograms by metric name and label values, bounded to
+    max_series label sets per metric.
+    '''
+
+    def __init__(self, max_series):
+        self.max_series = max_series
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def _series(self, name, kind, help_text, labels, factory):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = (kind, help_text, {})
+        series = metric[2]
+        key = tuple(labels.items())
+        if key not in series and len(series) >= self.max_series:
+            key = tuple((label, OVERFLOW_LABEL) for label in labels)
+        if key not in series:
+            series[key] = factory()
+        return series, key
+
+    def increment(self, name, help_text, labels, value=1):
+        with self.lock:
+            series, key = self._series(name, 'counter', help_text, labels, int)
+            series[key] += value
+
+    def observe(self, name, help_text, labels, value, buckets=LATENCY_BUCKETS):
+        with self.lock:
+            series, key = self._series(
+                name, 'histogram', help_text, labels,
+                lambda: Histogram(buckets))
+            series[key].observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.metrics.clear()
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, (kind, help_text, series) in sorted(self.metrics.items()):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for key, value in sorted(series.items()):
+                    if kind == 'counter':
+                        lines.append(f'{name}{format_labels(key)} {value}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(
+                            (*value.buckets, '+Inf'), value.counts):
+                        cumulative += count
+                        bucket_key = (*key, ('le', str(bound)))
+                        lines.append(
+                            f'{name}_bucket{format_labels(bucket_key)} {cumulative}')
+                    lines.append(f'{name}_sum{format_labels(key)} {value.sum!r}')
+                    lines.append(f'{name}_count{format_labels(key)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(key):
+    if not key:
+        return ''
+    escaped = (
+        (label, str(value).replace('\\', '\\\\').replace('"', '\\"')
+         .replace('\n', '\\n'))
+        for label, value in key
+    )
+    return '{' + ','.join(f'{label}="{value}"' for label, value in escaped) + '}'
+
+
+metrics = MetricsStore(settings.VENDOR_METRICS_MAX_SERIES)
+
+
+def route_name(request):
+    '''
+    Name of the URL pattern a request was resolved to, so every vendor
+    or purchase order id shares the same series.
+    '''
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+def timed(function):
+    '''
+    Records the duration of every call of a function.
+    '''
+    name = function.__name__
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.observe(
+                'vendor_function_duration_seconds',
+                'Duration of the vendor metric functions.',
+                {'function': name}, time.perf_counter() - started
+            )
+    return wrapper
+
+
+class QueryRecorder:
+    '''
+    Database execute wrapper counting and timing the queries of a
+    request, queries slower than VENDOR_SLOW_QUERY_THRESHOLD seconds are
+    logged.
+    '''
+
+    def __init__(self, request):
+        self.request = request
+        self.count = 0
+        self.duration = 0.0
+        self.threshold = settings.VENDOR_SLOW_QUERY_THRESHOLD
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if self.threshold is not None and duration >= self.threshold:
+                slow_query_logger.warning(
+                    'Slow query on %s (%.3fs): %s',
+                    route_name(self.request), duration, sql)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from vendor_app.models import Vendor
+from vendor_app.utils import (
+    backfill_derived_fields_chunk, backfill_lines_chunk, rebuild_metrics_chunk,
+)
+from vendor_app.rolling import rebuild_daily_performance
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the promised delivery date, on time flag, response time and '
+        'line items of purchase orders saved before those were stored, then '
+        'rebuild the running totals of vendor metrics and the daily rows of '
+        'the rolling metrics from them. Run it once after migrating, before '
+        'serving writes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Vendors whose purchase orders are filled per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        vendor_ids = list(
+            Vendor.objects.order_by('id').values_list('id', flat=True))
+        chunk_size = options['chunk_size']
+        chunks = [
+            vendor_ids[start:start + chunk_size]
+            for start in range(0, len(vendor_ids), chunk_size)
+        ]
+        filled = sum(backfill_derived_fields_chunk(chunk) for chunk in chunks)
+        self.stdout.write(
+            f'Filled {filled} purchase orders of {len(vendor_ids)} vendors.')
+        for chunk in chunks:
+            rebuild_metrics_chunk(chunk)
+        self.stdout.write(
+            f'Rebuilt the metric totals of {len(vendor_ids)} vendors.')
+        lines = sum(backfill_lines_chunk(chunk) for chunk in chunks)
+        self.stdout.write(f'Created {lines} purchase order lines.')
+        days = sum(rebuild_daily_performance(chunk) for chunk in chunks)
+        self.stdout.write(f'Built {days} daily performance rows.')
@@ -0,0 +1,75 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from vendor_app import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic vendors and purchase orders with bulk_create and '
+        'measure the API hot paths through the test client, sequentially '
+        'and from concurrent threads. Prints p50/p95/p99 latency, '
+        'throughput and queries per request of every endpoint as JSON. '
+        'Run it against a scratch database (DATABASE_URL) for large scales.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=100)
+        parser.add_argument(
+            '--orders', type=int, default=10000,
+            help='Purchase orders seeded, at least 10 times --requests so '
+                 'the acknowledge and complete scenarios do not run out.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per endpoint in each phase.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Threads of the concurrent phase, 1 skips it.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', choices=sorted(benchmarks.SCENARIOS),
+            help='Endpoints to run, all of them when left out.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host the test client sends, must be in ALLOWED_HOSTS.'
+        )
+        parser.add_argument('--output', help='Write the JSON report to a file.')
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Leave the seeded rows in the database.'
+        )
+
+    def handle(self, *args, **options):
+        if options['vendors'] < 1:
+            raise CommandError('--vendors must be at least 1')
+        data = benchmarks.seed(
+            options['vendors'], options['orders'],
+            batch_size=options['batch_size'], seed=options['seed']
+        )
+        try:
+            results = benchmarks.run(
+                data, options['scenario'] or list(benchmarks.SCENARIOS),
+                options['requests'], options['threads'],
+                host=options['host'], seed=options['seed']
+            )
+        finally:
+            if not options['keep']:
+                benchmarks.cleanup(data)
+
+        report = json.dumps({
+            'database': connection.vendor,
+            'vendors': options['vendors'],
+            'orders': options['orders'],
+            'requests': options['requests'],
+            'threads': options['threads'],
+            'endpoints': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        self.stdout.write(report)
@@ -0,0 +1,56 @@
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+from vendor_app.authentication import CachedJWTAuthentication, user_cache
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the stock JWTAuthentication with CachedJWTAuthentication '
+        'authenticating the same request N times. The staff user it signs '
+        'a token for is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    username=f'auth-benchmark-{uuid.uuid4().hex[:8]}',
+                    is_staff=True,
+                )
+                token = str(RefreshToken.for_user(user).access_token)
+                request = APIRequestFactory().get(
+                    '/api/vendors/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                for authentication in (JWTAuthentication(), CachedJWTAuthentication()):
+                    self.measure(authentication, request, options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            user_cache.clear()
+
+    def measure(self, authentication, request, requests):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                authentication.authenticate(request)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{type(authentication).__name__}: '
+            f'{elapsed / requests * 1e6:.1f}us per request, '
+            f'{requests / elapsed:.0f} requests/s, '
+            f'{len(queries)} queries'
+        )
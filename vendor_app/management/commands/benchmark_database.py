@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+import uuid
+from copy import copy
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction, DatabaseError
+from django.utils import timezone
+from vendor_app.models import Vendor, PurchaseOrder
+from vendor_app import utils
+from vendor_app.benchmarks import summarize
+from vendor_app.seeding import seed_vendors, seed_purchase_orders
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure purchase order write and read throughput of the configured '
+        'database with concurrent threads. Run it once per configuration '
+        '(e.g. SQLITE_TUNING=0, SQLITE_TUNING=1, DATABASE_URL=postgres://...) '
+        'to compare them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Seconds each thread keeps running.'
+        )
+        parser.add_argument(
+            '--orders', type=int, default=500,
+            help='Purchase orders created for the run.'
+        )
+
+    def handle(self, *args, **options):
+        # Every order belongs to one vendor, so writers contend on its row
+        prefix = f'BENCH-{uuid.uuid4().hex[:12]}'
+        profiles = seed_vendors(1, prefix, 0, 1000)
+        vendor_id = profiles[0].vendor_id
+        seed_purchase_orders(
+            0, 0, options['orders'], prefix, 0, profiles, timezone.now(), 1000)
+        utils.rebuild_metrics_chunk([vendor_id])
+        ids = list(
+            PurchaseOrder.objects.filter(vendor_id=vendor_id)
+            .values_list('id', flat=True)
+        )
+
+        try:
+            results = self.run_threads(vendor_id, ids, options)
+        finally:
+            Vendor.objects.filter(pk=vendor_id).delete()
+
+        self.stdout.write(f'database: {self.describe_database()}')
+        for kind in ('write', 'read'):
+            latencies, errors = results[kind]
+            summary = summarize(latencies, options['duration'], errors)
+            if not summary['requests']:
+                self.stdout.write(f'{kind}s: none completed, {errors} errors')
+                continue
+            self.stdout.write(
+                f'{kind}s: {summary["throughput_rps"]:.1f}/s, '
+                f'p50 {summary["p50_ms"]:.2f}ms, '
+                f'p95 {summary["p95_ms"]:.2f}ms, {errors} errors'
+            )
+
+    def describe_database(self):
+        if connection.vendor != 'sqlite':
+            return connection.vendor
+        pragmas = ', '.join(
+            f'{name}={value}' for name, value in settings.SQLITE_PRAGMAS.items()
+        )
+        return f'sqlite ({pragmas or "default pragmas"})'
+
+    def run_threads(self, vendor_id, ids, options):
+        deadline = time.perf_counter() + options['duration']
+        results = {'write': ([], [0]), 'read': ([], [0])}
+
+        def write():
+            purchase_order = PurchaseOrder.objects.select_for_update().get(
+                pk=random.choice(ids))
+            before = copy(purchase_order)
+            purchase_order.acknowledgment_date = timezone.now()
+            purchase_order.save(update_fields=['acknowledgment_date'])
+            utils.apply_metric_deltas(
+                vendor_id, utils.metric_changes(before, purchase_order))
+
+        def read():
+            Vendor.objects.values(*utils.METRIC_FIELDS).get(pk=vendor_id)
+            list(PurchaseOrder.objects.filter(vendor_id=vendor_id)
+                 .order_by('-order_date', '-id')[:50])
+
+        def worker(kind, operation):
+            latencies, errors = results[kind]
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        if kind == 'write':
+                            with transaction.atomic():
+                                operation()
+                        else:
+                            operation()
+                    except DatabaseError:
+                        errors[0] += 1
+                    else:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=('write', write))
+            for _ in range(options['writers'])
+        ] + [
+            threading.Thread(target=worker, args=('read', read))
+            for _ in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {kind: (latencies, errors[0])
+                for kind, (latencies, errors) in results.items()}
@@ -0,0 +1,94 @@
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from vendor_app.models import Vendor, PurchaseOrder
+from vendor_app.seeding import seed_vendors, seed_purchase_orders
+from vendor_app.serializers import (
+    VendorSerializer,
+    VendorPerformanceSerializer,
+    PurchaseOrderSerializer,
+)
+from vendor_app.fast_serializers import (
+    VendorFastSerializer,
+    VendorPerformanceFastSerializer,
+    PurchaseOrderFastSerializer,
+)
+from vendor_app.renderers import FastJSONRenderer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the ModelSerializers with the fast serializers used by the '
+        'list and performance endpoints, reading and rendering N rows. The '
+        'rows are created in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per measurement, the fastest one is reported.'
+        )
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            try:
+                with transaction.atomic():
+                    self.seed(rows)
+                    self.compare(rows, options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def seed(self, rows):
+        # N vendors, and N purchase orders all of the first one
+        prefix = f'SER-{uuid.uuid4().hex[:8]}'
+        profiles = seed_vendors(rows, prefix, 0, 1000)
+        seed_purchase_orders(
+            0, 0, rows, prefix, 0, profiles[:1], timezone.now(), 1000)
+        self.vendors = Vendor.objects.filter(
+            vendor_code__startswith=f'{prefix}-').order_by('id')
+        # Metrics are left unset by seeding, fill them like a live vendor
+        self.vendors.update(
+            on_time_delivery_rate=0.9,
+            quality_rating_avg=4.2,
+            average_response_time=1.5,
+            fulfillment_rate=0.95,
+        )
+        self.purchase_orders = PurchaseOrder.objects.filter(
+            vendor_id=profiles[0].vendor_id).order_by('-order_date', '-id')
+
+    def compare(self, rows, repeat):
+        cases = (
+            ('vendors', self.vendors, VendorSerializer, VendorFastSerializer),
+            ('performance', self.vendors, VendorPerformanceSerializer,
+             VendorPerformanceFastSerializer),
+            ('purchase orders', self.purchase_orders, PurchaseOrderSerializer,
+             PurchaseOrderFastSerializer),
+        )
+        for name, queryset, serializer_class, fast_serializer_class in cases:
+            current = self.best(repeat, lambda: JSONRenderer().render(
+                serializer_class(queryset, many=True).data))
+            fast = self.best(repeat, lambda: FastJSONRenderer().render(
+                fast_serializer_class.serialize(queryset)))
+            self.stdout.write(
+                f'{rows} {name}: serializer {current * 1000:.0f}ms, '
+                f'fast {fast * 1000:.0f}ms, {current / fast:.1f}x'
+            )
+
+    @staticmethod
+    def best(repeat, run):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from vendor_app.models import Vendor
+from vendor_app.utils import METRIC_FIELDS, rebuild_metrics_chunk
+from vendor_app.rolling import rebuild_daily_performance
+
+
+def _init_worker():
+    # Worker processes open their own database connections
+    django.setup()
+    connections.close_all()
+
+
+def rebuild_chunk(vendor_ids, dry_run):
+    drift = rebuild_metrics_chunk(vendor_ids, dry_run=dry_run)
+    if not dry_run:
+        rebuild_daily_performance(vendor_ids)
+    return drift
+
+
+def _rebuild_chunk(vendor_ids, dry_run):
+    try:
+        return rebuild_chunk(vendor_ids, dry_run)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the running totals, performance metrics and daily rows of '
+        'the rolling metrics of vendors from their purchase orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'vendor_ids', nargs='*', type=int,
+            help='Vendors to rebuild, every vendor when left out.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Vendors aggregated and written per query.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes the chunks are spread over.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report how far the stored values drifted without writing.'
+        )
+
+    def handle(self, *args, **options):
+        vendors = Vendor.objects.order_by('id')
+        if options['vendor_ids']:
+            vendors = vendors.filter(pk__in=options['vendor_ids'])
+        vendor_ids = list(vendors.values_list('id', flat=True))
+        chunk_size = options['chunk_size']
+        chunks = [
+            vendor_ids[start:start + chunk_size]
+            for start in range(0, len(vendor_ids), chunk_size)
+        ]
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stderr.write(
+                'SQLite allows a single writer, rebuilding in this process.'
+            )
+            workers = 1
+
+        if workers > 1 and len(chunks) > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker
+            ) as executor:
+                results = executor.map(
+                    _rebuild_chunk, chunks,
+                    [options['dry_run']] * len(chunks)
+                )
+                drift = [row for result in results for row in result]
+        else:
+            drift = [
+                row for chunk in chunks
+                for row in rebuild_chunk(chunk, options['dry_run'])
+            ]
+
+        self.report(drift, options['verbosity'])
+        action = 'Checked' if options['dry_run'] else 'Rebuilt'
+        self.stdout.write(
+            f'{action} {len(vendor_ids)} vendors, {len(drift)} had drifted.'
+        )
+
+    def report(self, drift, verbosity):
+        largest = dict.fromkeys(METRIC_FIELDS, 0.0)
+        for vendor_id, stored, rebuilt in drift:
+            changes = [
+                f'{name} {stored[name]} -> {rebuilt[name]}'
+                for name in stored if stored[name] != rebuilt[name]
+            ]
+            if verbosity > 0:
+                self.stdout.write(f'vendor {vendor_id}: ' + ', '.join(changes))
+            for name in METRIC_FIELDS:
+                difference = abs((stored[name] or 0) - (rebuilt[name] or 0))
+                largest[name] = max(largest[name], difference)
+
+        if drift:
+            self.stdout.write('Largest drift: ' + ', '.join(
+                f'{name} {value:.6g}' for name, value in largest.items()
+            ))
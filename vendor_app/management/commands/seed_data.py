@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+from vendor_app.models import Vendor
+from vendor_app.seeding import seed_vendors, seed_purchase_orders
+from vendor_app.utils import rebuild_metrics_chunk
+from vendor_app.rolling import rebuild_daily_performance
+
+
+def _init_worker():
+    # Worker processes open their own database connections
+    django.setup()
+    connections.close_all()
+
+
+def _seed_chunk(*args):
+    try:
+        return seed_purchase_orders(*args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate vendors and purchase orders with realistic distributions: '
+        'skewed orders per vendor, a mix of statuses, acknowledgment delays, '
+        'quality ratings and item lists. The same --seed gives the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=1000)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='SEED',
+            help='Prefix of the generated vendor codes and PO numbers.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Rows per INSERT statement.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Purchase orders generated per transaction.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes the chunks are spread over.'
+        )
+
+    def handle(self, *args, **options):
+        if options['vendors'] < 1:
+            raise CommandError('--vendors must be at least 1')
+        prefix = options['prefix']
+        if Vendor.objects.filter(vendor_code__startswith=f'{prefix}-V').exists():
+            raise CommandError(
+                f'Data seeded with prefix {prefix} already exists, '
+                f'pick another --prefix'
+            )
+
+        started = time.perf_counter()
+        profiles = seed_vendors(
+            options['vendors'], prefix, options['seed'], options['batch_size'])
+        self.stdout.write(
+            f'Created {len(profiles)} vendors in {time.perf_counter() - started:.1f}s.')
+
+        orders, chunk_size = options['orders'], options['chunk_size']
+        now = timezone.now()
+        chunks = [
+            (number, start, min(start + chunk_size, orders), prefix,
+             options['seed'], profiles, now, options['batch_size'])
+            for number, start in enumerate(range(0, orders, chunk_size))
+        ]
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stderr.write(
+                'SQLite allows a single writer, seeding in this process.'
+            )
+            workers = 1
+
+        if workers > 1 and len(chunks) > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker
+            ) as executor:
+                created = sum(executor.map(_seed_chunk, *zip(*chunks)))
+        else:
+            created = sum(seed_purchase_orders(*chunk) for chunk in chunks)
+        self.stdout.write(
+            f'Created {created} purchase orders in {time.perf_counter() - started:.1f}s.')
+
+        vendor_ids = [profile.vendor_id for profile in profiles]
+        for start in range(0, len(vendor_ids), 500):
+            rebuild_metrics_chunk(vendor_ids[start:start + 500])
+            rebuild_daily_performance(vendor_ids[start:start + 500])
+        self.stdout.write(
+            f'Computed vendor metrics in {time.perf_counter() - started:.1f}s.')
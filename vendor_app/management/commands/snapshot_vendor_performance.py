@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from vendor_app.models import Vendor, HistoricalPerformance
+from vendor_app.utils import METRIC_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Record the current performance metrics of every vendor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per INSERT statement.'
+        )
+
+    def handle(self, *args, **options):
+        snapshot_date = timezone.now()
+        rows = Vendor.objects.values_list('id', *METRIC_FIELDS).iterator(
+            chunk_size=options['batch_size']
+        )
+        snapshots = [
+            HistoricalPerformance(
+                vendor_id=vendor_id,
+                date=snapshot_date,
+                **dict(zip(METRIC_FIELDS, metrics))
+            )
+            for vendor_id, *metrics in rows
+        ]
+        HistoricalPerformance.objects.bulk_create(
+            snapshots, batch_size=options['batch_size']
+        )
+        self.stdout.write(
+            f'Recorded {len(snapshots)} vendor snapshots at {snapshot_date.isoformat()}'
+        )
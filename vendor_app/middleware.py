@@ -0,0 +1,76 @@
+import time
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.db import connection
+from .instrumentation import metrics, route_name, QueryRecorder, QUERY_COUNT_BUCKETS
+
+
+def _add_execute_wrapper(recorder):
+    connection.execute_wrappers.append(recorder)
+
+
+def _remove_execute_wrapper(recorder):
+    connection.execute_wrappers.remove(recorder)
+
+
+class RequestMetricsMiddleware:
+    '''
+    Records the latency, number of database queries and database time
+    of every request by route, see vendor_app.instrumentation.
+
+    Runs synchronously or asynchronously, like the rest of the chain, so
+    under ASGI the async views are not moved onto a worker thread.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = QueryRecorder(request)
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(request)
+        started = time.perf_counter()
+        # The async ORM and sync views run their queries on the thread
+        # of sync_to_async, which has its own connection
+        await sync_to_async(_add_execute_wrapper)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_execute_wrapper)(recorder)
+        self.record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, recorder, duration):
+        route = route_name(request)
+        labels = {'route': route, 'method': request.method}
+        metrics.increment(
+            'vendor_http_requests_total', 'Requests served.',
+            {**labels, 'status': str(response.status_code)}
+        )
+        metrics.observe(
+            'vendor_http_request_duration_seconds',
+            'Time spent serving a request.', labels, duration
+        )
+        metrics.observe(
+            'vendor_http_request_db_queries', 'Database queries per request.',
+            labels, recorder.count, buckets=QUERY_COUNT_BUCKETS
+        )
+        metrics.observe(
+            'vendor_http_request_db_duration_seconds',
+            'Time spent in database queries per request.',
+            labels, recorder.duration
+        )
@@ -14,6 +14,29 @@ class Vendor(models.Model):
     average_response_time = models.FloatField(null=True)
     fulfillment_rate = models.FloatField(null=True)
 
+    # Running totals the metrics above are derived from,
+    # kept up to date with F() expressions in utils.py
+    total_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    rated_count = models.IntegerField(default=0)
+    quality_sum = models.FloatField(default=0)
+    acknowledged_count = models.IntegerField(default=0)
+    response_time_sum = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            # Rankings of the batch performance endpoint
+            models.Index(fields=['on_time_delivery_rate'],
+                         name='vendor_on_time_rate_idx'),
+            models.Index(fields=['quality_rating_avg'],
+                         name='vendor_quality_avg_idx'),
+            models.Index(fields=['average_response_time'],
+                         name='vendor_response_time_idx'),
+            models.Index(fields=['fulfillment_rate'],
+                         name='vendor_fulfillment_rate_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -26,7 +49,9 @@ class PurchaseOrder(models.Model):
     ]
     po_number = models.CharField(max_length=50, unique=True)
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
-    order_date = models.DateTimeField(auto_now_add=True)
+    # Set when the order is inserted. A default instead of auto_now_add,
+    # so bulk loads of historical orders can keep their own dates
+    order_date = models.DateTimeField(default=timezone.now, editable=False)
     delivery_date = models.DateTimeField(
         default=timezone.now() + timezone.timedelta(days=7))
     items = models.JSONField()
@@ -36,18 +61,127 @@ class PurchaseOrder(models.Model):
     quality_rating = models.FloatField(null=True, blank=True)
     issue_date = models.DateTimeField()
     acknowledgment_date = models.DateTimeField(null=True, blank=True)
+    # Derived from the fields above by set_derived_fields() on every save,
+    # so the vendor metrics can be aggregated from stored columns
+    promised_delivery_date = models.DateTimeField(null=True, blank=True)
+    delivered_on_time = models.BooleanField(null=True, blank=True)
+    response_time_seconds = models.FloatField(null=True, blank=True)
+
+    DERIVED_FIELDS = (
+        'promised_delivery_date', 'delivered_on_time', 'response_time_seconds',
+    )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the purchase order list
+            models.Index(fields=['-order_date', '-id'],
+                         name='po_order_date_id_idx'),
+            # Purchase order list filters and vendor metric queries
+            models.Index(fields=['vendor', 'status'],
+                         name='po_vendor_status_idx'),
+            models.Index(fields=['vendor', 'acknowledgment_date'],
+                         name='po_vendor_ack_date_idx'),
+            models.Index(fields=['status', 'delivery_date'],
+                         name='po_status_delivery_date_idx'),
+            models.Index(fields=['vendor', 'delivered_on_time'],
+                         name='po_vendor_on_time_idx'),
+        ]
 
     def __str__(self):
         return f"PO {self.po_number} - {self.vendor.name}"
 
+    def set_derived_fields(self):
+        '''
+        Until the order is completed its promised delivery date follows
+        the delivery date, completing it sets the delivery date to the
+        actual delivery and leaves the promise as it was.
+        '''
+        if self.status != 'COMPLETED' or self.promised_delivery_date is None:
+            self.promised_delivery_date = self.delivery_date
+        self.delivered_on_time = (
+            self.delivery_date <= self.promised_delivery_date
+            if self.status == 'COMPLETED' else None
+        )
+        self.response_time_seconds = (
+            (self.acknowledgment_date - self.issue_date).total_seconds()
+            if self.acknowledgment_date is not None else None
+        )
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.set_derived_fields()
+        if update_fields:
+            update_fields = {*update_fields, *self.DERIVED_FIELDS}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class PurchaseOrderLine(models.Model):
+    '''
+    One entry of PurchaseOrder.items, stored as a row so SKU volumes and
+    vendor spend can be aggregated in SQL. The vendor is copied from the
+    purchase order for the (sku, vendor) index.
+    '''
+    purchase_order = models.ForeignKey(
+        PurchaseOrder, on_delete=models.CASCADE, related_name='lines')
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    sku = models.CharField(max_length=100)
+    qty = models.IntegerField()
+    unit_price = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sku', 'vendor'],
+                         name='po_line_sku_vendor_idx'),
+            models.Index(fields=['vendor', 'sku'],
+                         name='po_line_vendor_sku_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sku} x {self.qty}"
+
 
 class HistoricalPerformance(models.Model):
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
     date = models.DateTimeField()
-    on_time_delivery_rate = models.FloatField()
-    quality_rating_avg = models.FloatField()
-    average_response_time = models.FloatField()
-    fulfillment_rate = models.FloatField()
+    on_time_delivery_rate = models.FloatField(null=True)
+    quality_rating_avg = models.FloatField(null=True)
+    average_response_time = models.FloatField(null=True)
+    fulfillment_rate = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'date'],
+                         name='history_vendor_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vendor.name} - {self.date}"
+
+
+class DailyPerformance(models.Model):
+    '''
+    Running totals of the purchase orders of a vendor completed or
+    acknowledged on one day, kept up to date on every purchase order
+    change and summed over a few days for the rolling metrics.
+    response_time_buckets counts response times per bucket of
+    rolling.RESPONSE_TIME_BOUNDS.
+    '''
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    day = models.DateField()
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    rated_count = models.IntegerField(default=0)
+    quality_sum = models.FloatField(default=0.0)
+    acknowledged_count = models.IntegerField(default=0)
+    # In days, like Vendor.response_time_sum
+    response_time_sum = models.FloatField(default=0.0)
+    response_time_buckets = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'day'],
+                                    name='daily_performance_vendor_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor.name} - {self.day}"
@@ -0,0 +1,138 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import pagination, response
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+from .exports import export_value
+from .filters import MAX_ID
+
+
+class KeysetPagination(pagination.BasePagination):
+    '''
+    Cursor pagination on a composite key such as (order_date, id).
+
+    The cursor holds the key of the last row sent, the next page is
+    read with a WHERE on that key instead of an OFFSET, so a deep page
+    costs the same index range scan as the first one. Every field of
+    the ordering must share the same direction and the last one must
+    be unique.
+    '''
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        page_size = settings.VENDOR_PAGE_SIZE
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            pass
+        return max(1, min(page_size, settings.VENDOR_MAX_PAGE_SIZE))
+
+    def decode_cursor(self, request, model):
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            fields = [
+                model._meta.get_field(name.lstrip('-'))
+                for name in self.ordering
+            ]
+            if len(cursor['p']) != len(fields):
+                raise ValueError(self.invalid_cursor_message)
+            position = [
+                field.to_python(value)
+                for field, value in zip(fields, cursor['p'])
+            ]
+            # Integers the database cannot hold overflow the driver
+            if any(isinstance(value, int) and abs(value) > MAX_ID
+                   for value in position):
+                raise ValueError(self.invalid_cursor_message)
+            return position, bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        position = [
+            export_value(getattr(instance, name.lstrip('-')))
+            for name in self.ordering
+        ]
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        encoded = urlsafe_b64encode(cursor.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def keyset_filter(self, position, reverse):
+        names = [name.lstrip('-') for name in self.ordering]
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            term = Q(**{f'{names[index]}__{lookup}': position[index]})
+            for name, value in zip(names[:index], position[:index]):
+                term &= Q(**{name: value})
+            condition |= term
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        '''
+        The slice of the queryset holding the requested page and one more
+        row telling whether there is a page after it. Evaluated by the
+        caller, synchronously or with async iteration, and passed back
+        to finish_page().
+        '''
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(self.position, self.reverse))
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        has_next = has_more if not self.reverse else True
+        has_previous = has_more if self.reverse else self.position is not None
+        self.next = (
+            self.encode_cursor(results[-1], reverse=False)
+            if results and has_next else None
+        )
+        self.previous = (
+            self.encode_cursor(results[0], reverse=True)
+            if results and has_previous else None
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        return response.Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+
+class VendorPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class PurchaseOrderPagination(KeysetPagination):
+    ordering = ('-order_date', '-id')
@@ -0,0 +1,47 @@
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    '''
+    JSON renderer encoding with orjson when it is installed and with
+    DRF's own JSONRenderer otherwise.
+
+    Types orjson does not know, and datetimes so they keep DRF's format,
+    go through DRF's encoder. Indented output asked for in the Accept
+    header is left to the stdlib path.
+    '''
+    orjson_options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(
+                accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=JSONEncoder().default, option=self.orjson_options)
+        # Escaped like DRF does, so the output is valid JavaScript as well
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
+
+
+class PrometheusTextRenderer(renderers.BaseRenderer):
+    '''
+    Prometheus text exposition format, the view hands over the text.
+    Anything else, such as an authentication error, is sent as JSON.
+    '''
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return renderers.JSONRenderer().render(data)
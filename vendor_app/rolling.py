@@ -0,0 +1,310 @@
+'''
+Rolling window vendor metrics: on time delivery rate, quality rating
+and response time percentiles over the last VENDOR_ROLLING_WINDOWS days.
+
+Every purchase order change adds its difference to daily rows per
+vendor (DailyPerformance), the day an order was completed for the
+delivery metrics and the day it was acknowledged for the response time.
+A window is then summed from at most one row per day instead of the
+vendor's orders. Percentiles are read from a fixed histogram, so they
+are exact to the bucket and interpolated inside it.
+'''
+from bisect import bisect_right
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum, Count, Case, When, Value, IntegerField
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Vendor, PurchaseOrder, DailyPerformance
+from .cache import invalidate_vendor_performance
+from .instrumentation import timed
+from .utils import SECONDS_PER_DAY, ratio, negate
+
+
+# Upper bounds in seconds of the response time histogram buckets, a
+# last bucket holds the slower ones
+RESPONSE_TIME_BOUNDS = (
+    900, 1800, 3600, 2 * 3600, 4 * 3600, 8 * 3600, 12 * 3600,
+    SECONDS_PER_DAY, 2 * SECONDS_PER_DAY, 3 * SECONDS_PER_DAY,
+    5 * SECONDS_PER_DAY, 7 * SECONDS_PER_DAY, 14 * SECONDS_PER_DAY,
+    30 * SECONDS_PER_DAY,
+)
+
+RESPONSE_TIME_PERCENTILES = (50, 90)
+
+# DailyPerformance columns summed over a window
+DAILY_COUNTERS = (
+    'completed_count', 'on_time_count', 'rated_count', 'quality_sum',
+    'acknowledged_count', 'response_time_sum',
+)
+
+
+def response_time_bucket(seconds):
+    return bisect_right(RESPONSE_TIME_BOUNDS, seconds)
+
+
+def daily_contribution(purchase_order):
+    '''
+    What a single purchase order adds to the daily rows of its vendor,
+    keyed by (day, counter) with the histogram buckets as (day, index).
+    '''
+    contribution = {}
+    if purchase_order.status == 'COMPLETED':
+        day = timezone.localdate(purchase_order.delivery_date)
+        rated = purchase_order.quality_rating is not None
+        contribution[(day, 'completed_count')] = 1
+        contribution[(day, 'on_time_count')] = int(
+            bool(purchase_order.delivered_on_time))
+        contribution[(day, 'rated_count')] = int(rated)
+        contribution[(day, 'quality_sum')] = (
+            purchase_order.quality_rating if rated else 0.0)
+    seconds = purchase_order.response_time_seconds
+    if seconds is not None:
+        day = timezone.localdate(purchase_order.acknowledgment_date)
+        contribution[(day, 'acknowledged_count')] = 1
+        contribution[(day, 'response_time_sum')] = seconds / SECONDS_PER_DAY
+        contribution[(day, response_time_bucket(seconds))] = 1
+    return contribution
+
+
+def daily_changes(before, after):
+    '''
+    Difference between the daily contributions of a purchase order
+    before and after an update.
+    '''
+    old = daily_contribution(before)
+    new = daily_contribution(after)
+    changes = {
+        key: new.get(key, 0) - old.get(key, 0) for key in {*old, *new}
+    }
+    return {key: value for key, value in changes.items() if value}
+
+
+def vendor_daily_changes(before, after):
+    '''
+    daily_changes() per vendor, like utils.vendor_metric_changes().
+    '''
+    if before.vendor_id == after.vendor_id:
+        return {after.vendor_id: daily_changes(before, after)}
+    return {
+        before.vendor_id: negate(daily_contribution(before)),
+        after.vendor_id: daily_contribution(after),
+    }
+
+
+def group_daily_contributions(purchase_orders):
+    '''
+    Daily contributions of many purchase orders summed per vendor.
+    '''
+    deltas = {}
+    for purchase_order in purchase_orders:
+        vendor_deltas = deltas.setdefault(purchase_order.vendor_id, {})
+        for key, value in daily_contribution(purchase_order).items():
+            vendor_deltas[key] = vendor_deltas.get(key, 0) + value
+    return deltas
+
+
+def group_acknowledgments(acknowledged, acknowledged_at):
+    '''
+    Daily contributions per vendor of the purchase orders acknowledged
+    by utils.acknowledge_purchase_orders(), without reading them back.
+    '''
+    day = timezone.localdate(acknowledged_at)
+    deltas = {}
+    for vendor_id, seconds in acknowledged.values():
+        vendor_deltas = deltas.setdefault(vendor_id, {})
+        for key, value in (
+            ((day, 'acknowledged_count'), 1),
+            ((day, 'response_time_sum'), seconds / SECONDS_PER_DAY),
+            ((day, response_time_bucket(seconds)), 1),
+        ):
+            vendor_deltas[key] = vendor_deltas.get(key, 0) + value
+    return deltas
+
+
+@timed
+def apply_daily_deltas(vendor_deltas):
+    '''
+    Add {vendor_id: {(day, counter): value}} deltas to the daily rows.
+
+    The rows touched are locked, updated in memory and written back with
+    one bulk_update. Missing rows, the first change of a vendor on a day,
+    are inserted ignoring the ones a concurrent writer just created and
+    the rows are locked again.
+    '''
+    changes = {}
+    for vendor_id, deltas in vendor_deltas.items():
+        for (day, name), value in deltas.items():
+            if value:
+                changes.setdefault((vendor_id, day), {})[name] = value
+    if not changes:
+        return 0
+
+    keys = sorted(changes)
+    condition = Q()
+    for vendor_id, day in keys:
+        condition |= Q(vendor_id=vendor_id, day=day)
+    locked = DailyPerformance.objects.select_for_update().filter(
+        condition).order_by('vendor_id', 'day')
+    with transaction.atomic(savepoint=False):
+        rows = list(locked)
+        if len(rows) < len(keys):
+            found = {(row.vendor_id, row.day) for row in rows}
+            DailyPerformance.objects.bulk_create(
+                [DailyPerformance(vendor_id=vendor_id, day=day)
+                 for vendor_id, day in keys if (vendor_id, day) not in found],
+                ignore_conflicts=True
+            )
+            rows = list(locked.all())
+        for row in rows:
+            buckets = row.response_time_buckets
+            buckets.extend([0] * (len(RESPONSE_TIME_BOUNDS) + 1 - len(buckets)))
+            for name, value in changes[(row.vendor_id, row.day)].items():
+                if isinstance(name, int):
+                    buckets[name] += value
+                else:
+                    setattr(row, name, getattr(row, name) + value)
+        DailyPerformance.objects.bulk_update(
+            rows, [*DAILY_COUNTERS, 'response_time_buckets'])
+
+    for vendor_id in {vendor_id for vendor_id, _ in keys}:
+        invalidate_vendor_performance(vendor_id)
+    return len(rows)
+
+
+def _bucket_expression():
+    return Case(
+        *[
+            When(response_time_seconds__lt=bound, then=Value(index))
+            for index, bound in enumerate(RESPONSE_TIME_BOUNDS)
+        ],
+        default=Value(len(RESPONSE_TIME_BOUNDS)),
+        output_field=IntegerField(),
+    )
+
+
+@timed
+def rebuild_daily_performance(vendor_ids):
+    '''
+    Replace the daily rows of a chunk of vendors with ones aggregated
+    from their purchase orders, returns how many rows were written.
+    The vendor rows are locked first, like rebuild_metrics_chunk() does,
+    so writers of their metrics wait for the rebuild.
+    '''
+    orders = PurchaseOrder.objects.filter(vendor_id__in=vendor_ids)
+    rated = Q(quality_rating__isnull=False)
+    completed = orders.filter(status='COMPLETED').annotate(
+        day=TruncDate('delivery_date'),
+    ).values('vendor_id', 'day').annotate(
+        completed_count=Count('id'),
+        on_time_count=Count('id', filter=Q(delivered_on_time=True)),
+        rated_count=Count('id', filter=rated),
+        quality_sum=Sum('quality_rating', filter=rated),
+    ).order_by()
+    acknowledged = orders.filter(response_time_seconds__isnull=False).annotate(
+        day=TruncDate('acknowledgment_date'), bucket=_bucket_expression(),
+    ).values('vendor_id', 'day', 'bucket').annotate(
+        acknowledged_count=Count('id'),
+        response_time_sum=Sum('response_time_seconds'),
+    ).order_by()
+
+    with transaction.atomic():
+        list(Vendor.objects.select_for_update().filter(pk__in=vendor_ids)
+             .values_list('id', flat=True).order_by('id'))
+        rows = {}
+
+        def row_for(values):
+            key = (values['vendor_id'], values['day'])
+            if key not in rows:
+                rows[key] = DailyPerformance(
+                    vendor_id=key[0], day=key[1],
+                    response_time_buckets=[0] * (len(RESPONSE_TIME_BOUNDS) + 1),
+                )
+            return rows[key]
+
+        for values in completed:
+            row = row_for(values)
+            row.completed_count = values['completed_count']
+            row.on_time_count = values['on_time_count']
+            row.rated_count = values['rated_count']
+            row.quality_sum = values['quality_sum'] or 0.0
+        for values in acknowledged:
+            row = row_for(values)
+            row.acknowledged_count += values['acknowledged_count']
+            row.response_time_sum += (
+                values['response_time_sum'] / SECONDS_PER_DAY)
+            row.response_time_buckets[values['bucket']] = (
+                values['acknowledged_count'])
+
+        DailyPerformance.objects.filter(vendor_id__in=vendor_ids).delete()
+        DailyPerformance.objects.bulk_create(rows.values(), batch_size=500)
+    for vendor_id in vendor_ids:
+        invalidate_vendor_performance(vendor_id)
+    return len(rows)
+
+
+def window_rows(vendor_id, today):
+    '''
+    Daily rows of a vendor inside the longest rolling window, evaluated
+    by the caller, synchronously or with async iteration.
+    '''
+    since = today - timezone.timedelta(days=max(settings.VENDOR_ROLLING_WINDOWS))
+    return DailyPerformance.objects.filter(
+        vendor_id=vendor_id, day__gt=since
+    ).values('day', *DAILY_COUNTERS, 'response_time_buckets')
+
+
+def histogram_percentile(buckets, percentile):
+    '''
+    Percentile in days of the response times counted in buckets,
+    interpolated linearly inside the bucket it falls in.
+    '''
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = total * percentile / 100
+    cumulative = 0
+    for index, count in enumerate(buckets):
+        if count and cumulative + count >= rank:
+            lower = RESPONSE_TIME_BOUNDS[index - 1] if index else 0
+            if index == len(RESPONSE_TIME_BOUNDS):
+                return lower / SECONDS_PER_DAY
+            upper = RESPONSE_TIME_BOUNDS[index]
+            seconds = lower + (upper - lower) * (rank - cumulative) / count
+            return seconds / SECONDS_PER_DAY
+        cumulative += count
+    return None
+
+
+def rolling_metrics(rows, today):
+    '''
+    Metrics of every rolling window, from the rows of window_rows().
+    '''
+    windows = {}
+    for days in settings.VENDOR_ROLLING_WINDOWS:
+        since = today - timezone.timedelta(days=days)
+        totals = dict.fromkeys(DAILY_COUNTERS, 0)
+        buckets = [0] * (len(RESPONSE_TIME_BOUNDS) + 1)
+        for row in rows:
+            if row['day'] <= since:
+                continue
+            for name in DAILY_COUNTERS:
+                totals[name] += row[name]
+            for index, count in enumerate(row['response_time_buckets']):
+                buckets[index] += count
+
+        metrics = {
+            'completed_count': totals['completed_count'],
+            'acknowledged_count': totals['acknowledged_count'],
+            'on_time_delivery_rate': ratio(
+                totals['on_time_count'], totals['completed_count']),
+            'quality_rating_avg': ratio(
+                totals['quality_sum'], totals['rated_count']),
+            'average_response_time': ratio(
+                totals['response_time_sum'], totals['acknowledged_count']),
+        }
+        for percentile in RESPONSE_TIME_PERCENTILES:
+            metrics[f'response_time_p{percentile}'] = histogram_percentile(
+                buckets, percentile)
+        windows[f'{days}d'] = metrics
+    return windows
@@ -0,0 +1,155 @@
+'''
+Synthetic vendors and purchase orders with realistic distributions, used
+by the seed_data management command and the benchmarks.
+
+Orders are generated in chunks, each from its own RNG seeded with the
+run seed and the chunk number, so a run produces the same rows whatever
+the number of worker processes.
+'''
+import math
+import random
+from itertools import accumulate
+from django.db import transaction
+from django.utils import timezone
+from .models import Vendor, PurchaseOrder
+from . import utils
+
+
+STATUS_WEIGHTS = {'COMPLETED': 0.7, 'PENDING': 0.22, 'CANCELLED': 0.08}
+LINE_QUANTITIES = (1, 2, 5, 10, 20, 50, 100)
+LINE_QUANTITY_WEIGHTS = (30, 20, 20, 15, 8, 5, 2)
+SKU_CATALOG_SIZE = 5000
+
+NAME_WORDS = (
+    'Acme', 'Apex', 'Blue', 'Cedar', 'Delta', 'Eagle', 'Global', 'Harbor',
+    'Iron', 'Lakeside', 'Metro', 'North', 'Pacific', 'Summit', 'United',
+)
+NAME_SUFFIXES = (
+    'Supplies', 'Industries', 'Trading', 'Logistics', 'Manufacturing',
+    'Components', 'Wholesale', 'Distribution',
+)
+STREETS = ('Main', 'Oak', 'Market', 'Mill', 'Station', 'River', 'Park')
+
+
+class VendorProfile:
+    '''
+    Drawn once per vendor: its share of the orders (Pareto, so a few
+    vendors get most of them) and how it delivers and responds.
+    '''
+
+    def __init__(self, vendor_id, rng):
+        self.vendor_id = vendor_id
+        self.weight = rng.paretovariate(1.16)
+        self.on_time_probability = rng.betavariate(8, 2)
+        self.quality_mean = rng.uniform(3.0, 4.8)
+        self.response_hours = rng.lognormvariate(math.log(12), 0.8)
+
+
+def sku_catalog(seed):
+    '''
+    SKU popularity (Zipf like) and a fixed unit price per SKU.
+    '''
+    rng = random.Random(f'{seed}-catalog')
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(SKU_CATALOG_SIZE)]
+    prices = [
+        round(rng.lognormvariate(math.log(20), 1.2), 2)
+        for _ in range(SKU_CATALOG_SIZE)
+    ]
+    return list(accumulate(weights)), prices
+
+
+def seed_vendors(count, prefix, seed, batch_size):
+    rng = random.Random(f'{seed}-vendors')
+    vendors = []
+    for number in range(count):
+        name = f'{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {rng.choice(NAME_SUFFIXES)}'
+        vendors.append(Vendor(
+            name=name,
+            contact_details=f'orders{number}@vendor{number}.example, +1-555-{rng.randrange(10000):04}',
+            address=f'{rng.randrange(1, 9999)} {rng.choice(STREETS)} St, Suite {rng.randrange(1, 500)}',
+            vendor_code=f'{prefix}-V{number:07}',
+        ))
+    Vendor.objects.bulk_create(vendors, batch_size=batch_size)
+    vendor_ids = (
+        Vendor.objects.filter(vendor_code__startswith=f'{prefix}-V')
+        .order_by('vendor_code').values_list('id', flat=True)
+    )
+    return [VendorProfile(vendor_id, rng) for vendor_id in vendor_ids]
+
+
+def generate_purchase_order(number, prefix, profile, catalog, now, rng,
+                            status_weights=STATUS_WEIGHTS):
+    cumulative_sku_weights, prices = catalog
+    status = rng.choices(
+        list(status_weights), weights=list(status_weights.values()))[0]
+    order_date = now - timezone.timedelta(days=rng.uniform(0, 365))
+    issue_date = order_date + timezone.timedelta(minutes=rng.uniform(0, 240))
+    promised = order_date + timezone.timedelta(days=rng.randint(3, 21))
+
+    delivery_date = promised
+    if status == 'COMPLETED':
+        if rng.random() < profile.on_time_probability:
+            delivery_date = promised - timezone.timedelta(hours=rng.uniform(0, 48))
+        else:
+            delivery_date = promised + timezone.timedelta(hours=rng.uniform(1, 240))
+
+    acknowledged = status != 'PENDING' or rng.random() < 0.5
+    acknowledgment_date = issue_date + timezone.timedelta(
+        hours=rng.lognormvariate(math.log(profile.response_hours), 1.0)
+    ) if acknowledged else None
+
+    quality_rating = None
+    if status == 'COMPLETED' and rng.random() < 0.9:
+        rating = round(rng.gauss(profile.quality_mean, 0.6) * 2) / 2
+        quality_rating = min(5.0, max(1.0, rating))
+
+    items = []
+    for _ in range(min(5, 1 + int(rng.expovariate(0.8)))):
+        sku = rng.choices(
+            range(SKU_CATALOG_SIZE), cum_weights=cumulative_sku_weights)[0]
+        items.append({
+            'sku': f'SKU-{sku:05}',
+            'qty': rng.choices(LINE_QUANTITIES, weights=LINE_QUANTITY_WEIGHTS)[0],
+            'unit_price': f'{prices[sku]:.2f}',
+        })
+
+    purchase_order = PurchaseOrder(
+        po_number=f'{prefix}-{number:09}',
+        vendor_id=profile.vendor_id,
+        order_date=order_date,
+        delivery_date=delivery_date,
+        promised_delivery_date=promised,
+        items=items,
+        quantity=sum(item['qty'] for item in items),
+        status=status,
+        quality_rating=quality_rating,
+        issue_date=issue_date,
+        acknowledgment_date=acknowledgment_date,
+    )
+    purchase_order.set_derived_fields()
+    return purchase_order
+
+
+def seed_purchase_orders(chunk, start, stop, prefix, seed, profiles, now,
+                         batch_size, status_weights=STATUS_WEIGHTS):
+    '''
+    Insert purchase orders start to stop (exclusive) in bulk_create
+    batches of batch_size inside one transaction, returns how many.
+    '''
+    rng = random.Random(f'{seed}-orders-{chunk}')
+    catalog = sku_catalog(seed)
+    cumulative_weights = list(accumulate(profile.weight for profile in profiles))
+
+    with transaction.atomic():
+        for batch_start in range(start, stop, batch_size):
+            purchase_orders = [
+                generate_purchase_order(
+                    number, prefix,
+                    rng.choices(profiles, cum_weights=cumulative_weights)[0],
+                    catalog, now, rng, status_weights
+                )
+                for number in range(batch_start, min(batch_start + batch_size, stop))
+            ]
+            PurchaseOrder.objects.bulk_create(purchase_orders)
+            utils.create_purchase_order_lines(purchase_orders, batch_size=batch_size)
+    return stop - start
@@ -1,9 +1,25 @@
 from rest_framework import serializers
 from .models import Vendor, PurchaseOrder, HistoricalPerformance
 from django.utils import timezone
+from .utils import create_purchase_order_lines
+from .filters import MAX_ID
 
 
-class VendorSerializer(serializers.ModelSerializer):
+class UpdateFieldsMixin:
+    '''
+    Saves only the columns present in the request, so an update does not
+    write back stale copies of columns changed concurrently elsewhere,
+    such as the vendor metric counters.
+    '''
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+
+class VendorSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Vendor
         fields = ['id', 'name', 'contact_details', 'address', 'vendor_code']
@@ -22,7 +38,7 @@ class VendorPerformanceSerializer(serializers.ModelSerializer):
         pass
 
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
     status = serializers.CharField(default='PENDING')
     order_date = serializers.DateTimeField(default=timezone.now)
     delivery_date = serializers.DateTimeField(
@@ -36,9 +52,15 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = [
             'status', 'order_date', 'delivery_date',
-            'acknowledgment_date', 'quality_rating'
+            'acknowledgment_date', 'quality_rating',
+            *PurchaseOrder.DERIVED_FIELDS,
         ]
 
+    def create(self, validated_data):
+        # The order date is the time of the insert
+        validated_data.pop('order_date', None)
+        return super().create(validated_data)
+
     def update(self, instance, validated_data):
         if validated_data.get('status', None) == 'COMPLETED':
             validated_data['delivery_date'] = timezone.now()
@@ -49,3 +71,91 @@ class HistoricalPerformanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = HistoricalPerformance
         fields = '__all__'
+
+
+class PurchaseOrderBulkListSerializer(serializers.ListSerializer):
+    '''
+    Validates a batch of purchase orders row by row, running the
+    po_number uniqueness and vendor existence checks as one IN query
+    each for the whole batch.
+
+    Rows that fail validation are reported in row_errors instead of
+    failing the batch, validated_data holds only the valid rows.
+    '''
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                'non_field_errors': ['Expected a list of purchase orders.']
+            })
+
+        rows = []
+        self.row_errors = {}
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors[index] = exc.detail
+
+        po_numbers = [row['po_number'] for _, row in rows]
+        existing_po_numbers = set(
+            PurchaseOrder.objects.filter(po_number__in=po_numbers)
+            .values_list('po_number', flat=True)
+        )
+        existing_vendors = set(
+            Vendor.objects.filter(
+                pk__in={row['vendor_id'] for _, row in rows}
+            ).values_list('pk', flat=True)
+        )
+
+        valid_rows = []
+        seen_po_numbers = set()
+        for index, row in rows:
+            errors = {}
+            po_number = row['po_number']
+            if po_number in existing_po_numbers or po_number in seen_po_numbers:
+                errors['po_number'] = [
+                    'purchase order with this po number already exists.']
+            if row['vendor_id'] not in existing_vendors:
+                errors['vendor'] = [
+                    f'Invalid pk "{row["vendor_id"]}" - object does not exist.']
+            seen_po_numbers.add(po_number)
+
+            if errors:
+                self.row_errors[index] = errors
+            else:
+                valid_rows.append(row)
+                self.row_indexes.append(index)
+        return valid_rows
+
+    def run_validation(self, data=serializers.empty):
+        self.row_indexes = []
+        return super().run_validation(data)
+
+    def create(self, validated_data):
+        batch_size = self.context.get('batch_size')
+        purchase_orders = [
+            PurchaseOrder(**{
+                name: value for name, value in row.items() if name != 'order_date'
+            })
+            for row in validated_data
+        ]
+        # bulk_create does not call save() or send post_save
+        for purchase_order in purchase_orders:
+            purchase_order.set_derived_fields()
+        PurchaseOrder.objects.bulk_create(
+            purchase_orders, batch_size=batch_size
+        )
+        create_purchase_order_lines(purchase_orders, batch_size=batch_size)
+        return purchase_orders
+
+
+class PurchaseOrderBulkSerializer(PurchaseOrderSerializer):
+    # Bounded so an id the database cannot hold fails its own row instead
+    # of the vendor lookup of the whole batch
+    vendor = serializers.IntegerField(
+        source='vendor_id', min_value=1, max_value=MAX_ID)
+
+    class Meta(PurchaseOrderSerializer.Meta):
+        list_serializer_class = PurchaseOrderBulkListSerializer
+        extra_kwargs = {'po_number': {'validators': []}}
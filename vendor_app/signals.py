@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Vendor, PurchaseOrder, PurchaseOrderLine
+from .cache import invalidate_vendor_performance
+from .authentication import invalidate_cached_user
+from . import utils, rolling
+from .tasks import record_metric_changes, record_daily_changes
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def count_created_purchase_order(sender, instance, created, **kwargs):
+    if created:
+        record_metric_changes(
+            instance.vendor_id, utils.metric_contribution(instance)
+        )
+        record_daily_changes(
+            {instance.vendor_id: rolling.daily_contribution(instance)})
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def store_purchase_order_lines(sender, instance, created, update_fields=None, **kwargs):
+    if not created:
+        lines = PurchaseOrderLine.objects.filter(purchase_order=instance)
+        if update_fields is not None and not {'items', 'quantity'} & update_fields:
+            # Lines carry a copy of the vendor for the (sku, vendor) index
+            if {'vendor', 'vendor_id'} & update_fields:
+                lines.update(vendor_id=instance.vendor_id)
+            return
+        lines.delete()
+    utils.create_purchase_order_lines([instance])
+
+
+@receiver(post_delete, sender=PurchaseOrder)
+def uncount_deleted_purchase_order(sender, instance, origin=None, **kwargs):
+    # Nothing to keep up to date when the vendor itself is deleted, on
+    # its own or by a queryset
+    if isinstance(origin, Vendor) or getattr(origin, 'model', None) is Vendor:
+        return
+    record_metric_changes(
+        instance.vendor_id, utils.negate(utils.metric_contribution(instance))
+    )
+    record_daily_changes({instance.vendor_id: utils.negate(
+        rolling.daily_contribution(instance))})
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def drop_cached_vendor_performance(sender, instance, **kwargs):
+    invalidate_vendor_performance(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_user(sender, instance, **kwargs):
+    # Deactivated, demoted or deleted users lose access on their next request
+    invalidate_cached_user(instance)
@@ -0,0 +1,152 @@
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from . import utils, rolling
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsQueue:
+    '''
+    In-process background worker for vendor metric updates.
+
+    Changes submitted for the same vendor are summed while they wait,
+    so a burst of purchase order updates for one vendor ends up as a
+    single call of the handler. The worker thread is started on the
+    first submit.
+
+    When the handler fails the summed changes of that vendor are lost,
+    so recover([vendor_id]) rebuilds its totals from the purchase orders
+    instead. Changes still queued for the vendor are dropped first, the
+    rebuild already counts them.
+    '''
+
+    def __init__(self, handler, recover=None):
+        self.handler = handler
+        self.recover = recover
+        self._pending = {}
+        self._busy = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def submit(self, vendor_id, deltas):
+        with self._condition:
+            pending = self._pending.setdefault(vendor_id, {})
+            for name, value in deltas.items():
+                pending[name] = pending.get(name, 0) + value
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='vendor-metrics', daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        '''
+        Waits until every submitted change has been handled, returns
+        False if the timeout ran out first.
+        '''
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._busy, timeout
+            )
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                batch, self._pending = self._pending, {}
+                self._busy = True
+
+            close_old_connections()
+            for vendor_id, deltas in batch.items():
+                try:
+                    self.handler(vendor_id, deltas)
+                except Exception:
+                    logger.exception(
+                        'Could not update the metrics of vendor %s', vendor_id)
+                    self._recover(vendor_id)
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def _recover(self, vendor_id):
+        if self.recover is None:
+            return
+        with self._condition:
+            self._pending.pop(vendor_id, None)
+        try:
+            self.recover([vendor_id])
+        except Exception:
+            logger.exception(
+                'Could not rebuild the metrics of vendor %s, run '
+                'recompute_vendor_metrics', vendor_id)
+
+
+metrics_queue = MetricsQueue(
+    utils.apply_metric_deltas, recover=utils.rebuild_metrics_chunk)
+
+
+def apply_vendor_daily_deltas(vendor_id, deltas):
+    rolling.apply_daily_deltas({vendor_id: deltas})
+
+
+# Keyed by (day, counter) instead of counter, summed the same way
+daily_queue = MetricsQueue(
+    apply_vendor_daily_deltas, recover=rolling.rebuild_daily_performance)
+
+
+def flush(timeout=None):
+    '''
+    Waits until both the metric and the daily queue are drained, within
+    a single timeout, returns False if it ran out first.
+    '''
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for queue in (metrics_queue, daily_queue):
+        remaining = (
+            None if deadline is None else max(deadline - time.monotonic(), 0))
+        if not queue.flush(remaining):
+            return False
+    return True
+
+
+atexit.register(flush, timeout=30)
+
+
+def record_metric_changes(vendor_id, deltas):
+    '''
+    Applies metric deltas for a vendor, in the request when
+    VENDOR_METRICS_ASYNC is off, otherwise on the background queue once
+    the current transaction commits.
+    '''
+    if not any(deltas.values()):
+        return
+    if settings.VENDOR_METRICS_ASYNC:
+        transaction.on_commit(lambda: metrics_queue.submit(vendor_id, deltas))
+    else:
+        utils.apply_metric_deltas(vendor_id, deltas)
+
+
+def record_daily_changes(vendor_deltas):
+    '''
+    Applies {vendor_id: {(day, counter): value}} changes to the daily
+    rows behind the rolling metrics, like record_metric_changes().
+    '''
+    vendor_deltas = {
+        vendor_id: deltas
+        for vendor_id, deltas in vendor_deltas.items() if any(deltas.values())
+    }
+    if not vendor_deltas:
+        return
+    if settings.VENDOR_METRICS_ASYNC:
+        def submit():
+            for vendor_id, deltas in vendor_deltas.items():
+                daily_queue.submit(vendor_id, deltas)
+        transaction.on_commit(submit)
+    else:
+        rolling.apply_daily_deltas(vendor_deltas)
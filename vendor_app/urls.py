@@ -1,36 +1,96 @@
 from django.urls import path
+from . import async_views
 from .views import (
     index,
     acknowledge_purchase_order,
+    metrics_view,
     VendorListCreateView,
     VendorRetrieveUpdateDestroyView,
     PurchaseOrderListCreateView,
+    PurchaseOrderBulkCreateView,
+    PurchaseOrderBulkAcknowledgeView,
+    PurchaseOrderExportView,
+    VendorExportView,
     PurchaseOrderView,
     VendorPerformanceView,
+    VendorPerformanceBatchView,
+    VendorPerformanceHistoryView,
+    SkuVolumeView,
+    VendorSpendView,
+    DashboardView,
 )
 
 urlpatterns = [
     path('', index, name='index'),
 
+    # Request and metric function timings
+    path('api/_metrics', metrics_view, name='metrics'),
+
     # Vendor Profile Management
     path('api/vendors/', VendorListCreateView.as_view(), name='create-vendor'),
+    path('api/vendors/export/',
+         VendorExportView.as_view(),
+         name='export-vendors'),
     path('api/vendors/<int:pk>/',
          VendorRetrieveUpdateDestroyView.as_view(),
          name='vendor-detail'),
 
     # Vendor Performance Evaluation
+    path('api/vendors/performance/',
+         VendorPerformanceBatchView.as_view(),
+         name='vendor-performance-batch'),
     path('api/vendors/<int:vendor>/performance/',
          VendorPerformanceView.as_view(),
          name='vendor-performance'),
+    path('api/vendors/<int:vendor>/performance/history',
+         VendorPerformanceHistoryView.as_view(),
+         name='vendor-performance-history'),
+
+    # Operations dashboard
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+
+    # Purchase order line aggregates
+    path('api/vendors/spend/',
+         VendorSpendView.as_view(),
+         name='vendor-spend'),
+    path('api/purchase_orders/skus/',
+         SkuVolumeView.as_view(),
+         name='sku-volume'),
 
     # Purchase Order Tracking
     path('api/purchase_orders/',
          PurchaseOrderListCreateView.as_view(),
          name='create-purchase-order'),
+    path('api/purchase_orders/bulk/',
+         PurchaseOrderBulkCreateView.as_view(),
+         name='bulk-create-purchase-order'),
+    path('api/purchase_orders/acknowledge/',
+         PurchaseOrderBulkAcknowledgeView.as_view(),
+         name='bulk-acknowledge-purchase-orders'),
+    path('api/purchase_orders/export/',
+         PurchaseOrderExportView.as_view(),
+         name='export-purchase-orders'),
     path('api/purchase_orders/<int:pk>/',
          PurchaseOrderView.as_view(),
          name='purchase-order-detail'),
     path('api/purchase_orders/<int:pk>/acknowledge',
          view=acknowledge_purchase_order,
          name='acknowledge_purchase_order'),
+
+    # Async read endpoints for ASGI deployments
+    path('api/async/vendors/',
+         async_views.vendor_list,
+         name='async-vendor-list'),
+    path('api/async/vendors/<int:pk>/',
+         async_views.vendor_detail,
+         name='async-vendor-detail'),
+    path('api/async/vendors/<int:vendor>/performance/',
+         async_views.vendor_performance,
+         name='async-vendor-performance'),
+    path('api/async/purchase_orders/',
+         async_views.purchase_order_list,
+         name='async-purchase-order-list'),
+    path('api/async/purchase_orders/<int:pk>/',
+         async_views.purchase_order_detail,
+         name='async-purchase-order-detail'),
 ]
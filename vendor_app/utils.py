@@ -1,102 +1,424 @@
-from .models import PurchaseOrder
-from django.db.models import Q
+from decimal import Decimal, InvalidOperation
+from .models import PurchaseOrder, PurchaseOrderLine, Vendor
+from .cache import invalidate_vendor_performance
+from .instrumentation import timed
+from django.db import transaction
+from django.db.models import (
+    Q, F, Sum, Count, Case, When, Value, FloatField,
+)
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
 
 
-def time_diffrence_in_float_days(date1, date2):
-    diff = date2 - date1
-    return (diff.total_seconds())/ (24 * 3600)
+# Vendor performance metric columns
+METRIC_FIELDS = (
+    'on_time_delivery_rate', 'quality_rating_avg',
+    'average_response_time', 'fulfillment_rate',
+)
 
+# Vendor columns holding the running totals behind each metric
+METRIC_COUNTERS = (
+    'total_count', 'completed_count', 'on_time_count', 'rated_count',
+    'quality_sum', 'acknowledged_count', 'response_time_sum',
+)
 
-def update_on_time_delivery_rate(pk, on_time):
-    purchase_order = PurchaseOrder.objects.get(pk=pk)
-    vendor = purchase_order.vendor
+# Response times are stored in seconds and averaged in days
+SECONDS_PER_DAY = 24 * 3600
 
-    new_completed_order = 1 if on_time else 0
-    total_completed_orders = PurchaseOrder.objects.filter(
-        Q(vendor=vendor.id,status='COMPLETED')
-    ).count()
-    old_delivery_rate = vendor.on_time_delivery_rate
 
-    if total_completed_orders == 0:
-        return
+def ratio(numerator, denominator):
+    if not denominator:
+        return None
+    return numerator / denominator
 
-    if old_delivery_rate is not None:
-        previous_ontime_completed = (
-            old_delivery_rate*(total_completed_orders-1)
-        )
 
-        new_delivery_rate = (
-            (previous_ontime_completed
-             + new_completed_order) / total_completed_orders
+def derive_metrics(counters):
+    '''
+    Vendor metrics from a mapping of running totals.
+    '''
+    return {
+        'on_time_delivery_rate': ratio(
+            counters['on_time_count'], counters['completed_count']),
+        'quality_rating_avg': ratio(
+            counters['quality_sum'], counters['rated_count']),
+        'average_response_time': ratio(
+            counters['response_time_sum'], counters['acknowledged_count']),
+        'fulfillment_rate': ratio(
+            counters['completed_count'], counters['total_count']),
+    }
+
+
+def metric_contribution(purchase_order):
+    '''
+    Running totals a single purchase order adds to its vendor, read from
+    its stored fields so they match the aggregates of the table.
+    '''
+    completed = purchase_order.status == 'COMPLETED'
+    rated = completed and purchase_order.quality_rating is not None
+    acknowledged = purchase_order.response_time_seconds is not None
+    return {
+        'total_count': 1,
+        'completed_count': int(completed),
+        'on_time_count': int(completed and bool(purchase_order.delivered_on_time)),
+        'rated_count': int(rated),
+        'quality_sum': purchase_order.quality_rating if rated else 0.0,
+        'acknowledged_count': int(acknowledged),
+        'response_time_sum': (
+            purchase_order.response_time_seconds / SECONDS_PER_DAY
+            if acknowledged else 0.0
+        ),
+    }
+
+
+@timed
+def metric_changes(before, after):
+    '''
+    Difference between the contributions of a purchase order
+    before and after an update.
+    '''
+    old = metric_contribution(before)
+    new = metric_contribution(after)
+    return {name: new[name] - old[name] for name in METRIC_COUNTERS}
+
+
+def negate(deltas):
+    return {name: -value for name, value in deltas.items()}
+
+
+def vendor_metric_changes(before, after):
+    '''
+    metric_changes() per vendor, an order moved to another vendor leaves
+    the totals of the old one and is added to the new one.
+    '''
+    if before.vendor_id == after.vendor_id:
+        return {after.vendor_id: metric_changes(before, after)}
+    return {
+        before.vendor_id: negate(metric_contribution(before)),
+        after.vendor_id: metric_contribution(after),
+    }
+
+
+def _ratio_expression(numerator, denominator):
+    return Case(
+        When(GreaterThan(denominator, 0),
+             then=Cast(numerator, FloatField()) / denominator),
+        default=Value(None),
+        output_field=FloatField(),
+    )
+
+
+@timed
+def apply_metric_deltas(vendor_id, deltas):
+    '''
+    Add deltas to the running totals of a vendor and refresh the
+    derived metrics in one UPDATE statement, without reading the row.
+    '''
+    if not any(deltas.values()):
+        return 0
+
+    counters = {
+        name: F(name) + deltas[name] if deltas.get(name) else F(name)
+        for name in METRIC_COUNTERS
+    }
+    updates = {
+        name: counters[name]
+        for name in METRIC_COUNTERS if deltas.get(name)
+    }
+    updates.update(
+        on_time_delivery_rate=_ratio_expression(
+            counters['on_time_count'], counters['completed_count']),
+        quality_rating_avg=_ratio_expression(
+            counters['quality_sum'], counters['rated_count']),
+        average_response_time=_ratio_expression(
+            counters['response_time_sum'], counters['acknowledged_count']),
+        fulfillment_rate=_ratio_expression(
+            counters['completed_count'], counters['total_count']),
+    )
+    updated = Vendor.objects.filter(pk=vendor_id).update(**updates)
+    invalidate_vendor_performance(vendor_id)
+    return updated
+
+
+def vendor_metric_aggregates():
+    '''
+    Conditional aggregates used to rebuild the running totals of a
+    vendor from the purchase order table in a single query.
+    '''
+    completed = Q(status='COMPLETED')
+    on_time = Q(status='COMPLETED', delivered_on_time=True)
+    rated = Q(status='COMPLETED', quality_rating__isnull=False)
+    acknowledged = Q(response_time_seconds__isnull=False)
+    return {
+        'total_count': Count('id'),
+        'completed_count': Count('id', filter=completed),
+        'on_time_count': Count('id', filter=on_time),
+        'rated_count': Count('id', filter=rated),
+        'quality_sum': Sum('quality_rating', filter=rated),
+        'acknowledged_count': Count('id', filter=acknowledged),
+        'response_time_sum': Sum('response_time_seconds', filter=acknowledged),
+    }
+
+
+@timed
+def compute_vendor_totals(vendor_ids):
+    '''
+    Running totals rebuilt from the purchase order table for a chunk of
+    vendors, with one grouped aggregate query.
+    '''
+    rows = PurchaseOrder.objects.filter(vendor_id__in=vendor_ids).values(
+        'vendor_id').annotate(**vendor_metric_aggregates()).order_by()
+
+    totals = {
+        vendor_id: dict.fromkeys(METRIC_COUNTERS, 0) for vendor_id in vendor_ids
+    }
+    for row in rows:
+        row['response_time_sum'] = (
+            row['response_time_sum'] or 0.0) / SECONDS_PER_DAY
+        row['quality_sum'] = row['quality_sum'] or 0.0
+        totals[row.pop('vendor_id')] = row
+    return totals
+
+
+@timed
+def rebuild_metrics_chunk(vendor_ids, dry_run=False):
+    '''
+    Rebuild the running totals and metrics of a chunk of vendors and
+    write them with one bulk_update.
+
+    The vendor rows are locked first so counter updates made while the
+    aggregate runs wait instead of being overwritten. Returns the
+    stored and rebuilt values of every vendor that had drifted.
+    '''
+    fields = [*METRIC_COUNTERS, *METRIC_FIELDS]
+    drift = []
+    with transaction.atomic():
+        vendors = list(
+            Vendor.objects.select_for_update().filter(pk__in=vendor_ids)
+            .only('id', *fields).order_by('id')
         )
+        totals = compute_vendor_totals([vendor.pk for vendor in vendors])
+
+        for vendor in vendors:
+            rebuilt = totals[vendor.pk]
+            rebuilt.update(derive_metrics(rebuilt))
+
+            stored = {name: getattr(vendor, name) for name in fields}
+            if any(_drifted(stored[name], rebuilt[name]) for name in fields):
+                drift.append((vendor.pk, stored, rebuilt))
+            for name in fields:
+                setattr(vendor, name, rebuilt[name])
+
+        if not dry_run:
+            Vendor.objects.bulk_update(vendors, fields)
+    if not dry_run:
+        for vendor in vendors:
+            invalidate_vendor_performance(vendor.pk)
+    return drift
+
+
+def _drifted(stored, rebuilt, tolerance=1e-9):
+    if stored is None or rebuilt is None:
+        return stored != rebuilt
+    return abs(stored - rebuilt) > tolerance
+
+
+@timed
+def rebuild_vendor_metrics(vendor):
+    '''
+    Recompute the running totals and metrics of a single vendor.
+    '''
+    rebuild_metrics_chunk([vendor.pk])
+    vendor.refresh_from_db(fields=[*METRIC_COUNTERS, *METRIC_FIELDS])
+    return vendor
+
+
+@timed
+def backfill_derived_fields_chunk(vendor_ids):
+    '''
+    Fill the derived fields of the purchase orders of a chunk of vendors
+    saved before those fields existed, returns how many were filled.
 
-        vendor.on_time_delivery_rate = new_delivery_rate
-    else:
-        vendor.on_time_delivery_rate = (
-            new_completed_order/total_completed_orders
+    The promised date of orders completed back then is lost. Each vendor
+    keeps its on time count instead: its oldest such orders, up to that
+    count, are marked on time and the rest late. Vendors whose running
+    totals were never built (total_count is still 0) take the count from
+    their stored on time delivery rate.
+    '''
+    with transaction.atomic():
+        vendors = list(
+            Vendor.objects.select_for_update().filter(pk__in=vendor_ids)
+            .only('id', 'on_time_count', 'total_count', 'on_time_delivery_rate')
+            .order_by('id')
         )
+        completed = PurchaseOrder.objects.filter(
+            vendor_id__in=vendor_ids, status='COMPLETED'
+        ).values('vendor_id').annotate(
+            total=Count('id'),
+            flagged=Count('id', filter=Q(delivered_on_time=True)),
+        ).order_by()
+        completed = {row['vendor_id']: row for row in completed}
+        remaining = {}
+        for vendor in vendors:
+            counts = completed.get(vendor.pk, {'total': 0, 'flagged': 0})
+            on_time_count = vendor.on_time_count
+            if not vendor.total_count:
+                on_time_count = round(
+                    (vendor.on_time_delivery_rate or 0.0) * counts['total'])
+            remaining[vendor.pk] = on_time_count - counts['flagged']
+        purchase_orders = list(
+            PurchaseOrder.objects.filter(
+                vendor_id__in=vendor_ids, promised_delivery_date__isnull=True
+            ).only(
+                'id', 'vendor_id', 'status', 'delivery_date', 'issue_date',
+                'acknowledgment_date', *PurchaseOrder.DERIVED_FIELDS
+            ).order_by('vendor_id', 'id')
+        )
+        for purchase_order in purchase_orders:
+            purchase_order.set_derived_fields()
+            if purchase_order.status == 'COMPLETED':
+                on_time = remaining[purchase_order.vendor_id] > 0
+                purchase_order.delivered_on_time = on_time
+                remaining[purchase_order.vendor_id] -= int(on_time)
+        PurchaseOrder.objects.bulk_update(
+            purchase_orders, PurchaseOrder.DERIVED_FIELDS, batch_size=500)
+    return len(purchase_orders)
 
-    vendor.save()
 
+def purchase_order_lines(purchase_order):
+    '''
+    Unsaved line rows for the items of a purchase order.
 
-def update_fulfillment_rate(pk):
-    purchase_order = PurchaseOrder.objects.get(pk=pk)
-    vendor = purchase_order.vendor
+    An item is either a SKU string or an object with `sku` and optional
+    `qty` (or `quantity`) and `unit_price`. Items can also be a mapping
+    of SKU to qty (or to an object with `qty` and `unit_price`). Without
+    a qty the line gets the purchase order quantity when it is the only
+    item and 1 otherwise. Entries without a SKU or with an unreadable qty,
+    not a whole number or outside the integer column, are left out.
+    '''
+    items = purchase_order.items
+    if isinstance(items, dict) and 'sku' not in items:
+        items = [
+            {**value, 'sku': sku} if isinstance(value, dict)
+            else {'sku': sku, 'qty': value}
+            for sku, value in items.items()
+        ]
+    if not isinstance(items, list):
+        items = [items]
+    default_qty = purchase_order.quantity if len(items) == 1 else 1
+
+    lines = []
+    for item in items:
+        if isinstance(item, str):
+            item = {'sku': item}
+        if not isinstance(item, dict) or not item.get('sku'):
+            continue
+        try:
+            qty = Decimal(str(item.get('qty', item.get('quantity', default_qty))))
+        except InvalidOperation:
+            continue
+        whole = qty.is_finite() and qty == qty.to_integral_value()
+        if not whole or abs(qty) >= 2 ** 31:
+            continue
+        try:
+            unit_price = Decimal(str(item['unit_price']))
+        except (KeyError, InvalidOperation):
+            unit_price = None
+        if unit_price is not None and not (
+                unit_price.is_finite() and abs(unit_price) < 10 ** 10):
+            unit_price = None
+        lines.append(PurchaseOrderLine(
+            purchase_order_id=purchase_order.pk,
+            vendor_id=purchase_order.vendor_id,
+            sku=str(item['sku'])[:100],
+            qty=int(qty),
+            unit_price=unit_price,
+        ))
+    return lines
+
+
+def create_purchase_order_lines(purchase_orders, batch_size=None):
+    lines = [
+        line for purchase_order in purchase_orders
+        for line in purchase_order_lines(purchase_order)
+    ]
+    if lines:
+        PurchaseOrderLine.objects.bulk_create(lines, batch_size=batch_size)
+    return lines
 
-    total_orders = PurchaseOrder.objects.filter(
-        Q(vendor=vendor.id)
-    )
-    total_orders_count = total_orders.count()
-    total_completed_count = total_orders.filter(Q(status='COMPLETED')).count()
 
-    if total_completed_count == 0:
-        return
+def backfill_lines_chunk(vendor_ids):
+    '''
+    Create the lines of purchase orders of a chunk of vendors saved
+    before lines were stored, returns how many were created.
+    '''
+    purchase_orders = PurchaseOrder.objects.filter(
+        vendor_id__in=vendor_ids, lines__isnull=True
+    ).only('id', 'vendor_id', 'items', 'quantity').order_by('id')
+    return len(create_purchase_order_lines(purchase_orders, batch_size=500))
 
-    vendor.fulfillment_rate = total_completed_count/total_orders_count
-    vendor.save()
 
+@timed
+def group_metric_contributions(purchase_orders):
+    '''
+    Sums the contributions of many purchase orders per vendor, used for
+    orders inserted with bulk_create, which sends no post_save.
+    '''
+    deltas = {}
+    for purchase_order in purchase_orders:
+        vendor_deltas = deltas.setdefault(
+            purchase_order.vendor_id, dict.fromkeys(METRIC_COUNTERS, 0)
+        )
+        for name, value in metric_contribution(purchase_order).items():
+            vendor_deltas[name] += value
+    return deltas
+
+
+@timed
+def acknowledge_purchase_orders(ids, acknowledged_at):
+    '''
+    Stamp acknowledged_at on the unacknowledged purchase orders among ids
+    with one UPDATE, to be called inside a transaction.
 
-def update_average_response_time(pk):
-    purchase_order = PurchaseOrder.objects.get(pk=pk)
-    vendor = purchase_order.vendor
-    
-    old_response_time_avg = vendor.average_response_time
-    new_response_time = time_diffrence_in_float_days(
-        purchase_order.issue_date, purchase_order.delivery_date
+    Returns the vendor id and response time in seconds of each purchase
+    order acknowledged, by id, and the metric deltas per vendor, read
+    back with one grouped aggregate over the updated rows.
+    '''
+    pending = list(
+        PurchaseOrder.objects.select_for_update()
+        .filter(pk__in=ids, acknowledgment_date__isnull=True)
+        .values_list('pk', 'vendor_id', 'issue_date')
     )
-    
-    if old_response_time_avg is None:
-        vendor.average_response_time = new_response_time
-        vendor.save()
-        return
-    
-    total_acknoledge = PurchaseOrder.objects.filter(
-        vendor=vendor,acknowledgment_date__isnull=False).count()
-    old_total_response_time = old_response_time_avg*(total_acknoledge - 1)
-    
-    vendor.average_response_time = (old_total_response_time + new_response_time)/total_acknoledge
-    vendor.save()
-
-
-def update_quality_rating_avg(pk):
-    purchase_order = PurchaseOrder.objects.get(pk=pk)
-    vendor = purchase_order.vendor
-
-    old_quality_rate = vendor.quality_rating_avg
-    new_quality_score = purchase_order.quality_rating
-
-    if old_quality_rate is None:
-        vendor.quality_rating_avg = new_quality_score
-        vendor.save()
-        return
-
-    total_completed_orders = PurchaseOrder.objects.filter(
-        Q(vendor=vendor.id,status='COMPLETED')
-    ).count()
-
-    previous_total_quality = old_quality_rate*(total_completed_orders - 1)
-
-    vendor.quality_rating_avg = (
-        (previous_total_quality+new_quality_score)/total_completed_orders
+    if not pending:
+        return {}, {}
+
+    acknowledged = {
+        pk: (vendor_id, (acknowledged_at - issue_date).total_seconds())
+        for pk, vendor_id, issue_date in pending
+    }
+    PurchaseOrder.objects.filter(
+        pk__in=acknowledged, acknowledgment_date__isnull=True
+    ).update(
+        acknowledgment_date=acknowledged_at,
+        response_time_seconds=Case(
+            *[
+                When(pk=pk, then=Value(seconds))
+                for pk, (_, seconds) in acknowledged.items()
+            ],
+            output_field=FloatField(),
+        ),
     )
-    vendor.save()
+
+    rows = PurchaseOrder.objects.filter(pk__in=acknowledged).values(
+        'vendor_id',
+    ).annotate(
+        acknowledged_count=Count('id'),
+        response_time_sum=Sum('response_time_seconds'),
+    ).order_by()
+    deltas = {
+        row['vendor_id']: {
+            'acknowledged_count': row['acknowledged_count'],
+            'response_time_sum': row['response_time_sum'] / SECONDS_PER_DAY,
+        }
+        for row in rows
+    }
+    return acknowledged, deltas
@@ -1,13 +1,40 @@
-from django.http import HttpResponse
+from copy import copy
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Avg, Q, F, Sum, Count, DecimalField, ExpressionWrapper
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from rest_framework import generics, views, response, decorators, status, permissions
-from .models import Vendor, PurchaseOrder
+from django.utils.http import parse_etags
+from rest_framework import (
+    generics, views, response, decorators, status, permissions, parsers,
+    renderers,
+)
+from .models import (
+    Vendor, PurchaseOrder, PurchaseOrderLine, HistoricalPerformance,
+)
+from .parsers import NDJSONParser
+from . import exports, cache
+from .dashboard import dashboard_summary
+from .filters import (
+    filter_purchase_orders, filter_purchase_order_lines, parse_datetime_param,
+    is_id,
+)
+from .pagination import VendorPagination, PurchaseOrderPagination
 from .serializers import (
     VendorSerializer,
-    VendorPerformanceSerializer,
     PurchaseOrderSerializer,
+    PurchaseOrderBulkSerializer,
 )
-from . import utils
+from .fast_serializers import (
+    VendorFastSerializer,
+    VendorPerformanceFastSerializer,
+    PurchaseOrderFastSerializer,
+)
+from .renderers import FastJSONRenderer, PrometheusTextRenderer
+from .instrumentation import metrics
+from . import utils, rolling
+from .tasks import record_metric_changes, record_daily_changes
 
 
 # Create your views here.
@@ -15,9 +42,32 @@ def index(request):
     return HttpResponse("I am The Home Page :)")
 
 
-class VendorListCreateView(generics.ListCreateAPIView):
+# JSON responses of the read heavy views are encoded with orjson when installed
+FAST_RENDERER_CLASSES = [FastJSONRenderer, renderers.BrowsableAPIRenderer]
+
+
+class FastListMixin:
+    '''
+    Lists pages of value tuples through fast_serializer_class instead of
+    model instances through serializer_class, which is still used for
+    writes and the browsable API forms.
+    '''
+    fast_serializer_class = None
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.fast_serializer_class.values(
+            self.filter_queryset(self.get_queryset()), named=True)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            self.fast_serializer_class.to_representation(page))
+
+
+class VendorListCreateView(FastListMixin, generics.ListCreateAPIView):
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
+    fast_serializer_class = VendorFastSerializer
+    pagination_class = VendorPagination
     permission_classes = [
         permissions.IsAuthenticated,
         permissions.IsAdminUser
@@ -25,28 +75,333 @@ class VendorListCreateView(generics.ListCreateAPIView):
 
 
 class VendorPerformanceView(views.APIView):
+    '''
+    Performance metrics of a vendor, served from the cache and answered
+    with 304 Not Modified when the client's If-None-Match is current.
+    `rolling` holds the metrics of the last VENDOR_ROLLING_WINDOWS days,
+    summed from the vendor's daily rows.
+    '''
+    permission_classes = [
+        permissions.IsAuthenticated,
+        permissions.IsAdminUser
+    ]
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    def get(self, request, vendor, *args, **kwargs):
+        cached = cache.get_vendor_performance(vendor)
+        if cached is None:
+            rows = VendorPerformanceFastSerializer.serialize(
+                Vendor.objects.filter(pk=vendor))
+            if not rows:
+                return response.Response(
+                    {"message": "Vendor not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            today = timezone.localdate()
+            rows[0]['rolling'] = rolling.rolling_metrics(
+                list(rolling.window_rows(vendor, today)), today)
+            cached = cache.set_vendor_performance(vendor, rows[0])
+
+        payload, etag = cached
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return response.Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        return response.Response(payload, status=200, headers={'ETag': etag})
+
+
+class VendorPerformanceBatchView(views.APIView):
+    '''
+    Performance metrics of many vendors read with one values() query.
+
+    Vendors are picked with `ids` and/or `codes` (lists in a POST body or
+    comma separated in the query string) and narrowed with
+    `min_<metric>`/`max_<metric>`. `ordering` by a metric (prefix with
+    `-` for descending) together with `limit` gives top-N rankings, e.g.
+    `ordering=on_time_delivery_rate&limit=20` for the worst 20.
+    '''
     permission_classes = [
         permissions.IsAuthenticated,
         permissions.IsAdminUser
     ]
-    # Helper Method to getOBject
-    def get_object(self, pk):
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    def get(self, request, *args, **kwargs):
+        return self.performance(request.query_params)
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            return response.Response(
+                {"message": "Expected an object with ids or codes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self.performance(request.data)
+
+    @staticmethod
+    def param_list(params, name):
+        value = params.get(name)
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = value.split(',')
+        return [str(item).strip() for item in value if str(item).strip()]
+
+    def performance(self, params):
+        max_results = settings.VENDOR_MAX_PAGE_SIZE
+        vendors = Vendor.objects.all()
+
+        ids = self.param_list(params, 'ids')
+        codes = self.param_list(params, 'codes')
+        if len(ids) + len(codes) > max_results:
+            return response.Response(
+                {"message": f"At most {max_results} vendors per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not all(is_id(pk) for pk in ids):
+            return response.Response(
+                {"message": "ids must be vendor ids"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if ids and codes:
+            vendors = vendors.filter(Q(pk__in=ids) | Q(vendor_code__in=codes))
+        elif ids:
+            vendors = vendors.filter(pk__in=ids)
+        elif codes:
+            vendors = vendors.filter(vendor_code__in=codes)
+
         try:
-            vender = Vendor.objects.get(pk=pk)
-            return vender
-        except Vendor.DoesNotExist:
-            return None
+            for metric in utils.METRIC_FIELDS:
+                if params.get(f'min_{metric}') not in (None, ''):
+                    vendors = vendors.filter(**{
+                        f'{metric}__gte': float(params[f'min_{metric}'])})
+                if params.get(f'max_{metric}') not in (None, ''):
+                    vendors = vendors.filter(**{
+                        f'{metric}__lte': float(params[f'max_{metric}'])})
+            limit = min(int(params.get('limit') or max_results), max_results)
+        except (TypeError, ValueError):
+            return response.Response(
+                {"message": "Metric bounds and limit must be numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(limit, 0)
+
+        ordering = str(params.get('ordering') or 'id')
+        if ordering.lstrip('-') not in ('id', *utils.METRIC_FIELDS):
+            return response.Response(
+                {"message": f"Cannot order by {ordering}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if ordering.lstrip('-') != 'id':
+            # Vendors without the metric yet are left out of rankings
+            vendors = vendors.filter(
+                **{f'{ordering.lstrip("-")}__isnull': False})
+
+        results = VendorPerformanceFastSerializer.to_representation(
+            VendorPerformanceFastSerializer.values(
+                vendors.order_by(ordering, 'id'))[:limit]
+        )
+        return response.Response({'results': results}, status=200)
+
+
+class VendorPerformanceHistoryView(views.APIView):
+    '''
+    Recorded performance snapshots of a vendor, optionally limited with
+    `start`/`end` and averaged into `daily` or `weekly` buckets.
+    '''
+    permission_classes = [
+        permissions.IsAuthenticated,
+        permissions.IsAdminUser
+    ]
+    buckets = {
+        'daily': TruncDay,
+        'weekly': TruncWeek,
+    }
 
     def get(self, request, vendor, *args, **kwargs):
-        vendor = self.get_object(vendor)
-        if vendor:
-            serializer = VendorPerformanceSerializer(vendor)
-            return response.Response(serializer.data, status=200)
+        bucket = request.query_params.get('bucket')
+        if bucket is not None and bucket not in self.buckets:
+            return response.Response(
+                {"message": f"Unsupported bucket {bucket}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        history = HistoricalPerformance.objects.filter(vendor_id=vendor)
+        if request.query_params.get('start'):
+            history = history.filter(date__gte=parse_datetime_param(
+                'start', request.query_params['start']))
+        if request.query_params.get('end'):
+            history = history.filter(date__lte=parse_datetime_param(
+                'end', request.query_params['end']))
+
+        if bucket:
+            history = history.annotate(
+                bucket=self.buckets[bucket]('date')
+            ).values('bucket').annotate(
+                **{name: Avg(name) for name in utils.METRIC_FIELDS}
+            ).order_by('bucket')
+            results = [
+                {'date': row.pop('bucket'), **row} for row in history
+            ]
         else:
+            results = list(
+                history.order_by('date').values('date', *utils.METRIC_FIELDS)
+            )
+
+        if not results and not Vendor.objects.filter(pk=vendor).exists():
             return response.Response(
                 {"message": "Vendor not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        return response.Response(
+            {'vendor': vendor, 'bucket': bucket, 'results': results},
+            status=status.HTTP_200_OK
+        )
+
+
+class PurchaseOrderLineAggregateView(views.APIView):
+    '''
+    Grouped SQL aggregates over purchase order lines, filtered with `sku`,
+    `vendor`, `order_date_after`/`order_date_before` and split per month
+    with `bucket=monthly`.
+    '''
+    permission_classes = [
+        permissions.IsAuthenticated,
+        permissions.IsAdminUser
+    ]
+    buckets = {
+        'monthly': TruncMonth,
+    }
+    # {name: aggregate expression} computed per group
+    aggregates = {}
+    group_by = ()
+    ordering_fields = ()
+    default_ordering = None
+
+    def get_group_by(self, params):
+        return list(self.group_by)
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        bucket = params.get('bucket')
+        if bucket is not None and bucket not in self.buckets:
+            return response.Response(
+                {"message": f"Unsupported bucket {bucket}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ordering = params.get('ordering') or self.default_ordering
+        if ordering.lstrip('-') not in self.ordering_fields:
+            return response.Response(
+                {"message": f"Cannot order by {ordering}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_results = settings.VENDOR_MAX_PAGE_SIZE
+        try:
+            limit = max(min(int(params.get('limit') or max_results), max_results), 0)
+        except ValueError:
+            return response.Response(
+                {"message": "limit must be a number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = filter_purchase_order_lines(
+            PurchaseOrderLine.objects.all(), params)
+        group_by = self.get_group_by(params)
+        if bucket:
+            lines = lines.annotate(
+                month=self.buckets[bucket]('purchase_order__order_date'))
+            group_by.append('month')
+        # NULLs, e.g. the spend of vendors without priced lines, sort last
+        # on every backend, PostgreSQL puts them first when descending
+        field = F(ordering.lstrip('-'))
+        order = (field.desc(nulls_last=True) if ordering.startswith('-')
+                 else field.asc(nulls_last=True))
+        results = list(
+            lines.values(*group_by).annotate(**self.aggregates)
+            .order_by(order, *group_by)[:limit]
+        )
+        return response.Response(
+            {'bucket': bucket, 'results': results}, status=status.HTTP_200_OK)
+
+
+class SkuVolumeView(PurchaseOrderLineAggregateView):
+    '''
+    Quantity ordered per SKU, per SKU and vendor with `by_vendor=true`
+    (e.g. `?sku=X&by_vendor=true` for the vendors that supplied SKU X).
+    '''
+    aggregates = {
+        'quantity': Sum('qty'),
+        'orders': Count('purchase_order', distinct=True),
+    }
+    ordering_fields = ('sku', 'quantity', 'orders')
+    default_ordering = 'sku'
+
+    def get_group_by(self, params):
+        if params.get('by_vendor', '').lower() in ('true', '1', 'yes'):
+            return ['sku', 'vendor_id']
+        return ['sku']
+
+
+class VendorSpendView(PurchaseOrderLineAggregateView):
+    '''
+    Spend (qty * unit_price, lines without a price are left out of it)
+    and quantity ordered per vendor, largest spend first.
+    '''
+    aggregates = {
+        'spend': Sum(ExpressionWrapper(
+            F('qty') * F('unit_price'),
+            output_field=DecimalField(max_digits=24, decimal_places=2)
+        )),
+        'quantity': Sum('qty'),
+        'orders': Count('purchase_order', distinct=True),
+        'skus': Count('sku', distinct=True),
+    }
+    ordering_fields = ('vendor_id', 'spend', 'quantity', 'orders')
+    default_ordering = '-spend'
+    group_by = ('vendor_id',)
+
+
+class DashboardView(views.APIView):
+    '''
+    Fleet wide purchase order counts and vendor metric distributions,
+    with a per-vendor breakdown when `by_vendor=true` (the `limit` vendors
+    with the most overdue orders). `unacknowledged_hours` (default 24)
+    sets when an unacknowledged order is counted as stale. Served from
+    a short lived cache.
+    '''
+    permission_classes = [
+        permissions.IsAuthenticated,
+        permissions.IsAdminUser
+    ]
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        by_vendor = params.get('by_vendor', '').lower() in ('true', '1', 'yes')
+        try:
+            hours = float(params.get('unacknowledged_hours') or 24)
+            limit = max(min(
+                int(params.get('limit') or settings.VENDOR_PAGE_SIZE),
+                settings.VENDOR_MAX_PAGE_SIZE
+            ), 0)
+        except ValueError:
+            return response.Response(
+                {"message": "unacknowledged_hours and limit must be numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= hours <= 24 * 365:
+            return response.Response(
+                {"message": "unacknowledged_hours must be between 0 and 8760"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        key = (('hours', hours), ('by_vendor', by_vendor),
+               ('limit', limit if by_vendor else None))
+        summary = cache.get_dashboard(key)
+        if summary is None:
+            summary = dashboard_summary(
+                timezone.timedelta(hours=hours), by_vendor, limit)
+            cache.set_dashboard(key, summary)
+        return response.Response(summary, status=status.HTTP_200_OK)
 
 
 class VendorRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -58,53 +413,168 @@ class VendorRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     ]
 
 
-class PurchaseOrderListCreateView(generics.ListCreateAPIView):
+class PurchaseOrderListCreateView(FastListMixin, generics.ListCreateAPIView):
     queryset = PurchaseOrder.objects.all()
     serializer_class = PurchaseOrderSerializer
+    fast_serializer_class = PurchaseOrderFastSerializer
+    pagination_class = PurchaseOrderPagination
     permission_classes = [
         permissions.IsAuthenticated,
         permissions.IsAdminUser
     ]
 
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = filter_purchase_orders(
+                queryset, self.request.query_params)
+        return queryset
+
+
+class PurchaseOrderBulkCreateView(views.APIView):
+    '''
+    Creates many purchase orders from a JSON array or NDJSON body.
+
+    Valid rows are inserted with bulk_create inside one transaction,
+    invalid rows are reported by their position in the payload.
+    '''
+    parser_classes = [parsers.JSONParser, NDJSONParser]
+    permission_classes = [
+        permissions.IsAuthenticated,
+        permissions.IsAdminUser
+    ]
+
+    def post(self, request, *args, **kwargs):
+        serializer = PurchaseOrderBulkSerializer(
+            data=request.data,
+            many=True,
+            context={'batch_size': settings.VENDOR_BULK_CREATE_BATCH_SIZE}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            with transaction.atomic():
+                purchase_orders = serializer.save()
+                created_deltas = utils.group_metric_contributions(
+                    purchase_orders)
+                for vendor_id, deltas in created_deltas.items():
+                    record_metric_changes(vendor_id, deltas)
+                record_daily_changes(
+                    rolling.group_daily_contributions(purchase_orders))
+        except IntegrityError as e:
+            return response.Response(
+                {"message": str(e)},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        created = [
+            {'row': index, 'id': purchase_order.pk,
+             'po_number': purchase_order.po_number}
+            for index, purchase_order in zip(
+                serializer.row_indexes, purchase_orders)
+        ]
+        errors = [
+            {'row': index, 'errors': row_errors}
+            for index, row_errors in sorted(serializer.row_errors.items())
+        ]
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+        return response.Response(
+            {'created': created, 'errors': errors},
+            status=response_status
+        )
+
+
+class StreamingExportView(views.APIView):
+    '''
+    Streams every row of the queryset as NDJSON or CSV, chosen with
+    the `type` query parameter, reading the table in chunks.
+    '''
+    queryset = None
+    fields = ()
+    filename = None
+    permission_classes = [
+        permissions.IsAuthenticated,
+        permissions.IsAdminUser
+    ]
+
+    def get(self, request, *args, **kwargs):
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in exports.EXPORT_TYPES:
+            return response.Response(
+                {"message": f"Unsupported export type {export_type}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stream, content_type = exports.EXPORT_TYPES[export_type]
+        streaming_response = StreamingHttpResponse(
+            stream(
+                self.get_queryset(), self.fields,
+                settings.VENDOR_EXPORT_CHUNK_SIZE
+            ),
+            content_type=content_type
+        )
+        streaming_response['Content-Disposition'] = (
+            f'attachment; filename="{self.filename}.{export_type}"'
+        )
+        return streaming_response
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+
+class VendorExportView(StreamingExportView):
+    queryset = Vendor.objects.order_by('id')
+    fields = exports.VENDOR_EXPORT_FIELDS
+    filename = 'vendors'
+
+
+class PurchaseOrderExportView(StreamingExportView):
+    queryset = PurchaseOrder.objects.order_by('id')
+    fields = exports.PURCHASE_ORDER_EXPORT_FIELDS
+    filename = 'purchase_orders'
+
+    def get_queryset(self):
+        return filter_purchase_orders(
+            self.queryset.all(), self.request.query_params)
 
 
 class PurchaseOrderView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = PurchaseOrder.objects.all()
+    queryset = PurchaseOrder.objects.select_related('vendor')
     serializer_class = PurchaseOrderSerializer
     permission_classes = [
         permissions.IsAuthenticated,
         permissions.IsAdminUser
     ]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in permissions.SAFE_METHODS:
+            # Writers of the same purchase order wait for each other, so
+            # the state kept before the update is the one being replaced
+            queryset = queryset.select_for_update(of=('self',))
+        return queryset
+
     def perform_update(self, serializer) -> None:
-        before_update_po = self.get_object()
+        # serializer.instance is the purchase order loaded once by
+        # get_object(), keep its state from before the update in memory
+        before_update_po = copy(serializer.instance)
 
         # Update the purchase order object
         super().perform_update(serializer)
 
-        after_update_po = self.get_object()
-
-        # Calculate Vendor Metrics
-        if before_update_po.status != after_update_po.status:
-            
-            utils.update_fulfillment_rate(pk=self.get_object().id)
-            
-            delivered_on_time = (
-                before_update_po.delivery_date >= after_update_po.delivery_date
-            )
-
-            if after_update_po.status == 'COMPLETED':
-                utils.update_on_time_delivery_rate(
-                    pk=self.get_object().id, on_time=delivered_on_time)
-                
-                # On Change of Completion If quality rating is provided
-                if after_update_po.quality_rating is not None:
-                    utils.update_quality_rating_avg(
-                        pk=self.get_object().id
-                    )
-
+        # Calculate Vendor Metrics, of both vendors when it was changed
+        vendor_deltas = utils.vendor_metric_changes(
+            before_update_po, serializer.instance)
+        for vendor_id, deltas in vendor_deltas.items():
+            record_metric_changes(vendor_id, deltas)
+        record_daily_changes(rolling.vendor_daily_changes(
+            before_update_po, serializer.instance))
 
     def update(self, request, *args, **kwargs):
         '''
@@ -115,7 +585,73 @@ class PurchaseOrderView(generics.RetrieveUpdateDestroyAPIView):
         then also provide the updated delivery date.
         '''
         kwargs['partial'] = True
-        return super().update(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+
+class PurchaseOrderBulkAcknowledgeView(views.APIView):
+    '''
+    Acknowledges many purchase orders at once, given as `ids` (a list in
+    the body or comma separated), with one UPDATE and one counter update
+    per vendor. Every id is reported as acknowledged,
+    already_acknowledged or not_found.
+    '''
+    permission_classes = [
+        permissions.IsAuthenticated,
+        permissions.IsAdminUser
+    ]
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            return response.Response(
+                {"message": "Expected an object with ids"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids = VendorPerformanceBatchView.param_list(request.data, 'ids')
+        max_results = settings.VENDOR_MAX_PAGE_SIZE
+        if not ids or not all(is_id(pk) for pk in ids):
+            return response.Response(
+                {"message": "ids must be a list of purchase order ids"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > max_results:
+            return response.Response(
+                {"message": f"At most {max_results} purchase orders per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids = list(dict.fromkeys(int(pk) for pk in ids))
+
+        acknowledged_at = timezone.now()
+        with transaction.atomic():
+            acknowledged, vendor_deltas = utils.acknowledge_purchase_orders(
+                ids, acknowledged_at)
+            for vendor_id, deltas in vendor_deltas.items():
+                record_metric_changes(vendor_id, deltas)
+            record_daily_changes(
+                rolling.group_acknowledgments(acknowledged, acknowledged_at))
+
+        acknowledged = set(acknowledged)
+        remaining = [pk for pk in ids if pk not in acknowledged]
+        existing = set(
+            PurchaseOrder.objects.filter(pk__in=remaining)
+            .values_list('pk', flat=True)
+        ) if remaining else set()
+        results = [
+            {'id': pk, 'status': (
+                'acknowledged' if pk in acknowledged
+                else 'already_acknowledged' if pk in existing
+                else 'not_found'
+            )}
+            for pk in ids
+        ]
+        return response.Response(
+            {'acknowledgment_date': acknowledged_at, 'results': results},
+            status=status.HTTP_200_OK
+        )
 
 
 @decorators.api_view(['POST', 'GET'])
@@ -123,10 +659,17 @@ class PurchaseOrderView(generics.RetrieveUpdateDestroyAPIView):
 def acknowledge_purchase_order(request, pk):
     if request.method == 'POST':
         try:
-            purchase_order = PurchaseOrder.objects.get(pk=pk)
-            purchase_order.acknowledgment_date = timezone.now()
-            purchase_order.save()
-            utils.update_average_response_time(pk=purchase_order.id)
+            with transaction.atomic():
+                purchase_order = PurchaseOrder.objects.select_for_update().get(pk=pk)
+                before_acknowledgment = copy(purchase_order)
+                purchase_order.acknowledgment_date = timezone.now()
+                purchase_order.save(update_fields=['acknowledgment_date'])
+                record_metric_changes(
+                    purchase_order.vendor_id,
+                    utils.metric_changes(before_acknowledgment, purchase_order)
+                )
+                record_daily_changes({purchase_order.vendor_id: rolling.daily_changes(
+                    before_acknowledgment, purchase_order)})
 
             return response.Response(
                 {"message": "Acknowledgment successful"},
@@ -144,3 +687,17 @@ def acknowledge_purchase_order(request, pk):
             )
     if request.method == 'GET':
         return response.Response({'messege': 'Bad Request'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@decorators.api_view(['GET'])
+@decorators.permission_classes([permissions.IsAuthenticated, permissions.IsAdminUser])
+@decorators.renderer_classes([PrometheusTextRenderer, renderers.JSONRenderer])
+def metrics_view(request):
+    '''
+    Request latency, database and metric function timings of this
+    process in the Prometheus text format.
+    '''
+    return response.Response(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )